@@ -0,0 +1,104 @@
+import random
+import struct
+from pathlib import Path
+from dataclasses import dataclass, replace
+
+# A deterministic generator of synthetic Standard MIDI Files. The same config
+# and seed always produce the same bytes, so results can be compared between
+# versions of the parser.
+
+averageEventSize = 3
+
+@dataclass
+class CorpusConfig:
+    tracksCount: int = 8
+    eventsPerTrack: int = 10000
+    # Average number of events per quarter note.
+    density: float = 8.0
+    # Probability of omitting a status byte that running status allows.
+    runningStatus: float = 1.0
+    metaRatio: float = 0.01
+    sysExRatio: float = 0.005
+    midiFormat: int = 1
+    ppqn: int = 480
+    seed: int = 0
+
+    def withFileSize(self, fileSize):
+        eventsPerTrack = max(1, fileSize // (self.tracksCount * averageEventSize))
+        return replace(self, eventsPerTrack = eventsPerTrack)
+
+def packVLQ(value):
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(data))
+
+def packMeta(eventType, payload):
+    return bytes((0xFF, eventType)) + packVLQ(len(payload)) + payload
+
+def generateTrack(config, generator, trackIndex):
+    data = bytearray()
+    lastStatus = 0
+    pendingNotes = []
+    channel = trackIndex % 16
+    meanDelta = config.ppqn / config.density
+
+    def emitChannel(status, *dataBytes):
+        nonlocal lastStatus
+        if status != lastStatus or generator.random() >= config.runningStatus:
+            data.append(status)
+        data.extend(dataBytes)
+        lastStatus = status
+
+    data += packVLQ(0) + packMeta(0x03, f"Track {trackIndex}".encode("latin_1"))
+    if trackIndex == 0: data += packVLQ(0) + packMeta(0x51, struct.pack(">I", 500000)[1:])
+    for i in range(config.eventsPerTrack):
+        data += packVLQ(int(generator.expovariate(1 / meanDelta)) if meanDelta else 0)
+        kind = generator.random()
+        if kind < config.metaRatio:
+            if generator.random() < 0.5:
+                tempo = generator.randrange(300000, 900000)
+                data += packMeta(0x51, struct.pack(">I", tempo)[1:])
+            else:
+                data += packMeta(0x06, f"Marker {i}".encode("latin_1"))
+            lastStatus = 0
+        elif kind < config.metaRatio + config.sysExRatio:
+            payload = bytes(generator.randrange(128) for j in range(generator.randrange(4, 64)))
+            data += b"\xF0" + packVLQ(len(payload) + 1) + payload + b"\xF7"
+            lastStatus = 0
+        elif pendingNotes and generator.random() < 0.5:
+            note = pendingNotes.pop(generator.randrange(len(pendingNotes)))
+            emitChannel(0x90 | channel, note, 0)
+        elif generator.random() < 0.8:
+            note = generator.randrange(24, 108)
+            pendingNotes.append(note)
+            emitChannel(0x90 | channel, note, generator.randrange(1, 128))
+        elif generator.random() < 0.7:
+            emitChannel(0xB0 | channel, generator.randrange(128), generator.randrange(128))
+        elif generator.random() < 0.8:
+            emitChannel(0xE0 | channel, generator.randrange(128), generator.randrange(128))
+        else:
+            emitChannel(0xC0 | channel, generator.randrange(128))
+    data += packVLQ(0) + packMeta(0x2F, b"")
+    return bytes(data)
+
+def generateFile(config):
+    generator = random.Random(config.seed)
+    header = b"MThd" + struct.pack(">IHHH", 6, config.midiFormat, config.tracksCount, config.ppqn)
+    chunks = [header]
+    for trackIndex in range(config.tracksCount):
+        track = generateTrack(config, generator, trackIndex)
+        chunks.append(b"MTrk" + struct.pack(">I", len(track)) + track)
+    return b"".join(chunks)
+
+def writeCorpus(directory, filesCount, config):
+    directory = Path(directory)
+    directory.mkdir(parents = True, exist_ok = True)
+    paths = []
+    for i in range(filesCount):
+        path = directory / f"synthetic-{config.seed + i:06d}.mid"
+        path.write_bytes(generateFile(replace(config, seed = config.seed + i)))
+        paths.append(path)
+    return paths
@@ -0,0 +1,42 @@
+import time
+import random
+from io import BytesIO
+from midiparser.parser import *
+from . corpus import CorpusConfig, generateTrack
+
+# Compares the stream decoder used by the fromMemoryMap classmethods with the
+# offset based decoder on a synthetic track, and the scalar columnar decoder
+# with the bulk one when NumPy is installed. Run with python -m benchmarks.decoder
+
+def measure(function, repeat):
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(eventsCount = 200000, repeat = 5):
+    config = CorpusConfig(tracksCount = 1, eventsPerTrack = eventsCount)
+    track = generateTrack(config, random.Random(config.seed), 0)
+    streamTime = measure(lambda: parseEvents(BytesIO(track)), repeat)
+    bufferTime = measure(lambda: decodeEvents(track, 0, MidiParseState()), repeat)
+    viewTime = measure(lambda: decodeEvents(memoryview(track), 0, MidiParseState()), repeat)
+    timings = [("parseEvents", streamTime), ("decodeEvents(bytes)", bufferTime),
+               ("decodeEvents(memoryview)", viewTime)]
+    try:
+        from midiparser.columnar import TrackArrays
+    except ImportError:
+        pass
+    else:
+        timings.append(("TrackArrays.fromBuffer", measure(lambda: TrackArrays.fromBuffer(track, 0), repeat)))
+        timings.append(("TrackArrays.fromChunk", measure(lambda: TrackArrays.fromChunk(track, 0, len(track)), repeat)))
+
+    megabytes = len(track) / 1e6
+    print(f"{eventsCount + 1} events, {megabytes:.2f} MB")
+    for name, seconds in timings:
+        print(f"{name:26} {seconds * 1e3:8.1f} ms {eventsCount / seconds / 1e6:6.2f} Mevents/s "
+              f"{megabytes / seconds:6.2f} MB/s {streamTime / seconds:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from midiparser.events import *
+
+# Reports the resident bytes per event of the slotted event classes next to
+# equivalent dict based dataclasses. Run with python -m benchmarks.memory
+
+def dictBasedClass(eventClass):
+    return make_dataclass(eventClass.__name__, [(field.name, field.type) for field in fields(eventClass)])
+
+def bytesPerEvent(eventClass, arguments, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    events = [eventClass(*arguments) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Exclude the list that holds the events.
+    return (after - before) / count - 8
+
+def main(count = 100000):
+    samples = (
+        (NoteOnEvent, (120, 3, 60, 100)),
+        (ControllerEvent, (0, 3, 7, 100)),
+        (ProgramEvent, (0, 3, 5)),
+        (PitchBendEvent, (10, 3, 0, 64)),
+        (TempoEvent, (0, 500000)),
+        (EndOfTrackEvent, (0,)),
+    )
+    print(f"{'event':22} {'dict':>8} {'slots':>8} {'saved':>8}")
+    for eventClass, arguments in samples:
+        dictBased = bytesPerEvent(dictBasedClass(eventClass), arguments, count)
+        slotted = bytesPerEvent(eventClass, arguments, count)
+        print(f"{eventClass.__name__:22} {dictBased:8.1f} {slotted:8.1f} {1 - slotted / dictBased:8.0%}")
+
+if __name__ == "__main__":
+    main()
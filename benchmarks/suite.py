@@ -0,0 +1,145 @@
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from dataclasses import dataclass, asdict, replace
+from midiparser.parser import *
+from . corpus import CorpusConfig, generateFile, packVLQ
+
+# Throughput and memory benchmarks for the parser. Run with python -m benchmarks,
+# optionally saving the results with --save and comparing a later run against
+# them with --compare.
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    seconds: float
+    events: int
+    bytes: int
+    peakMemory: int
+
+    @property
+    def eventsPerSecond(self):
+        return self.events / self.seconds
+
+    @property
+    def megabytesPerSecond(self):
+        return self.bytes / self.seconds / 1e6
+
+def measure(name, function, events, size, repeat):
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return BenchmarkResult(name, best, events, size, peakMemory)
+
+def countEvents(data):
+    return sum(len(track.events) for track in MidiFile.fromBuffer(data).tracks)
+
+def benchmarkFile(label, config, directory, repeat):
+    data = generateFile(config)
+    filePath = Path(directory) / f"{label}.mid"
+    filePath.write_bytes(data)
+    events = countEvents(data)
+    midiFile = MidiFile.fromBuffer(data)
+    midiFormat, tracksCount, ppqn, offset = decodeHeader(data)
+    trackIndex = decodeTrackIndex(data, offset, tracksCount)
+
+    def parseStream():
+        for offset, chunkLength in trackIndex:
+            parseEvents(io.BytesIO(data[offset : offset + chunkLength]))
+
+    def decodeBuffer():
+        for offset, chunkLength in trackIndex:
+            decodeEvents(data, offset, MidiParseState())
+
+    def parseLazyTrack():
+        with MidiFile.fromFile(filePath, lazy = True) as midiFile:
+            midiFile.tracks[-1]
+
+    # The parallel case reuses one pool, so only the decoding is measured and
+    # not the start of the worker processes.
+    executor = ProcessPoolExecutor(max_workers = os.cpu_count())
+    cases = [
+        (f"{label}: MidiFile.fromFile", lambda: MidiFile.fromFile(filePath), events),
+        (f"{label}: MidiFile.fromFile parallel", lambda: MidiFile.fromFile(filePath, executor = executor), events),
+        (f"{label}: MidiFile.fromFile lazy, one track", parseLazyTrack, len(midiFile.tracks[-1].events)),
+        (f"{label}: parseEvents", parseStream, events),
+        (f"{label}: decodeEvents", decodeBuffer, events),
+        (f"{label}: MidiFile.toBytes", midiFile.toBytes, events),
+    ]
+    try:
+        from midiparser.columnar import MidiFileArrays
+        cases.append((f"{label}: MidiFileArrays.fromFile", lambda: MidiFileArrays.fromFile(filePath), events))
+    except ImportError:
+        pass
+    try:
+        return [measure(name, function, count, len(data), repeat) for name, function, count in cases]
+    finally:
+        executor.shutdown()
+
+def benchmarkVLQ(repeat, count = 100000):
+    values = [0, 0x7F, 0x3FFF, 0x1FFFFF, 0x0FFFFFFF] * (count // 5)
+    data = b"".join(packVLQ(value) for value in values)
+
+    def unpackStream():
+        stream = io.BytesIO(data)
+        for i in range(len(values)): unpackVLQ(stream)
+
+    def decodeBuffer():
+        offset = 0
+        for i in range(len(values)): value, offset = decodeVLQ(data, offset)
+
+    return [measure("unpackVLQ", unpackStream, len(values), len(data), repeat),
+            measure("decodeVLQ", decodeBuffer, len(values), len(data), repeat)]
+
+scenarios = {
+    "dense": CorpusConfig(tracksCount = 4, eventsPerTrack = 50000),
+    "orchestral": CorpusConfig(tracksCount = 32, eventsPerTrack = 5000),
+    "no-running-status": CorpusConfig(tracksCount = 4, eventsPerTrack = 50000, runningStatus = 0.0),
+    "sysex-heavy": CorpusConfig(tracksCount = 4, eventsPerTrack = 20000, metaRatio = 0.1, sysExRatio = 0.2),
+}
+
+def runSuite(repeat = 3, scale = 1.0):
+    results = benchmarkVLQ(repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        for label, config in scenarios.items():
+            config = replace(config, eventsPerTrack = max(1, int(config.eventsPerTrack * scale)))
+            results.extend(benchmarkFile(label, config, directory, repeat))
+    return results
+
+def printResults(results, baseline = None):
+    print(f"{'benchmark':52} {'ms':>9} {'Mevents/s':>10} {'MB/s':>8} {'peak MB':>8}", end = "")
+    print(f" {'vs base':>8}" if baseline else "")
+    for result in results:
+        print(f"{result.name:52} {result.seconds * 1e3:9.2f} {result.eventsPerSecond / 1e6:10.3f} "
+              f"{result.megabytesPerSecond:8.2f} {result.peakMemory / 1e6:8.2f}", end = "")
+        if baseline and result.name in baseline:
+            print(f" {baseline[result.name]['seconds'] / result.seconds:7.2f}x")
+        else:
+            print()
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the MIDI parser.")
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--scale", type = float, default = 1.0, help = "Scale the number of events per track.")
+    parser.add_argument("--save", help = "Save the results to a JSON file.")
+    parser.add_argument("--compare", help = "Compare with results saved by an earlier run.")
+    options = parser.parse_args(arguments)
+
+    results = runSuite(options.repeat, options.scale)
+    baseline = None
+    if options.compare:
+        baseline = {result["name"] : result for result in json.loads(Path(options.compare).read_text())}
+    printResults(results, baseline)
+    if options.save:
+        Path(options.save).write_text(json.dumps([asdict(result) for result in results], indent = 2))
@@ -0,0 +1,156 @@
+import os
+import mmap
+import numpy
+import struct
+import hashlib
+import tempfile
+from pathlib import Path
+from . columnar import TrackArrays, MidiFileArrays
+
+# Cache entries store the columns of every track back to back, so a warm load
+# only memory maps the entry and wraps its regions in NumPy arrays.
+#
+# Entry layout, all little endian and every section aligned to 8 bytes:
+#   header: magic, version, midiFormat, ppqn, tracksCount
+#   per track: eventsCount, payloadsCount, payloadBytes
+#   per track: deltaTime, tick, status, channel, data1, data2,
+#              payload event indices, payload offsets, payload bytes
+
+entryMagic = b"MIDC"
+entryVersion = 1
+entryHeaderStruct = struct.Struct("<4sIHHI")
+trackHeaderStruct = struct.Struct("<QQQ")
+entrySuffix = ".midc"
+
+columnTypes = (
+    ("deltaTime", numpy.dtype("<u4")),
+    ("tick", numpy.dtype("<i8")),
+    ("status", numpy.dtype("u1")),
+    ("channel", numpy.dtype("u1")),
+    ("data1", numpy.dtype("u1")),
+    ("data2", numpy.dtype("u1")),
+)
+
+def align(offset):
+    return (offset + 7) & ~7
+
+def encodeEntry(midiFileArrays):
+    sections = []
+    header = entryHeaderStruct.pack(entryMagic, entryVersion, midiFileArrays.midiFormat,
+                                    midiFileArrays.ppqn, len(midiFileArrays.tracks))
+    trackHeaders = []
+    for track in midiFileArrays.tracks:
+        payloadIndices = numpy.array(sorted(track.payloads), dtype = "<i8")
+        payloads = [bytes(track.payloads[index]) for index in payloadIndices.tolist()]
+        payloadOffsets = numpy.zeros(len(payloads) + 1, dtype = "<i8")
+        numpy.cumsum([len(payload) for payload in payloads], out = payloadOffsets[1:])
+        trackHeaders.append(trackHeaderStruct.pack(len(track), len(payloads), int(payloadOffsets[-1])))
+        for name, dtype in columnTypes:
+            sections.append(numpy.ascontiguousarray(getattr(track, name), dtype = dtype).tobytes())
+        sections.extend((payloadIndices.tobytes(), payloadOffsets.tobytes(), b"".join(payloads)))
+
+    data = bytearray(header + b"".join(trackHeaders))
+    for section in sections:
+        data += bytes(align(len(data)) - len(data))
+        data += section
+    return data
+
+def decodeEntry(buffer):
+    magic, version, midiFormat, ppqn, tracksCount = entryHeaderStruct.unpack_from(buffer, 0)
+    if magic != entryMagic or version != entryVersion:
+        raise ValueError("Not a parse cache entry.")
+    offset = entryHeaderStruct.size
+    trackHeaders = []
+    for i in range(tracksCount):
+        trackHeaders.append(trackHeaderStruct.unpack_from(buffer, offset))
+        offset += trackHeaderStruct.size
+
+    def section(dtype, count):
+        nonlocal offset
+        offset = align(offset)
+        array = numpy.frombuffer(buffer, dtype = dtype, count = count, offset = offset)
+        offset += array.nbytes
+        return array
+
+    tracks = []
+    for eventsCount, payloadsCount, payloadBytes in trackHeaders:
+        columns = [section(dtype, eventsCount) for name, dtype in columnTypes]
+        payloadIndices = section("<i8", payloadsCount).tolist()
+        payloadOffsets = section("<i8", payloadsCount + 1).tolist()
+        blob = section("u1", payloadBytes)
+        payloads = {index : blob[start : end].tobytes()
+            for index, start, end in zip(payloadIndices, payloadOffsets, payloadOffsets[1:])}
+        tracks.append(TrackArrays(*columns, payloads))
+    return MidiFileArrays(midiFormat, ppqn, tracks)
+
+class ParseCache:
+    def __init__(self, directory, maxBytes = 1 << 30, keyByContent = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.maxBytes = maxBytes
+        self.keyByContent = keyByContent
+        self.hits = 0
+        self.misses = 0
+        self.totalBytes = sum(entry.stat().st_size for entry in self.entries())
+
+    def entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(entrySuffix)]
+
+    def key(self, filePath):
+        if self.keyByContent:
+            with open(filePath, "rb") as f:
+                return hashlib.blake2b(f.read(), digest_size = 20).hexdigest()
+        status = os.stat(filePath)
+        identity = f"{os.path.abspath(filePath)}\0{status.st_size}\0{status.st_mtime_ns}"
+        return hashlib.blake2b(identity.encode("utf-8"), digest_size = 20).hexdigest()
+
+    def entryPath(self, filePath):
+        return self.directory / (self.key(filePath) + entrySuffix)
+
+    def load(self, filePath):
+        entryPath = self.entryPath(filePath)
+        try:
+            with open(entryPath, "rb") as f:
+                memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            midiFileArrays = decodeEntry(memoryMap)
+        except FileNotFoundError:
+            pass
+        except (ValueError, struct.error):
+            # Empty, truncated or foreign entries are replaced by a fresh parse.
+            os.remove(entryPath)
+        else:
+            self.hits += 1
+            # Touch the entry so eviction removes the least recently used ones first.
+            os.utime(entryPath)
+            return midiFileArrays
+
+        self.misses += 1
+        midiFileArrays = MidiFileArrays.fromFile(filePath)
+        self.store(entryPath, encodeEntry(midiFileArrays))
+        return midiFileArrays
+
+    def loadMidiFile(self, filePath):
+        return self.load(filePath).toMidiFile()
+
+    def store(self, entryPath, data):
+        if len(data) > self.maxBytes: return
+        descriptor, temporaryPath = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        os.replace(temporaryPath, entryPath)
+        self.totalBytes += len(data)
+        if self.totalBytes > self.maxBytes: self.evict()
+
+    def evict(self):
+        entries = sorted(self.entries(), key = lambda entry: entry.stat().st_mtime_ns)
+        self.totalBytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.totalBytes <= self.maxBytes: break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self.totalBytes -= size
+
+    def clear(self):
+        for entry in self.entries():
+            os.remove(entry.path)
+        self.totalBytes = 0
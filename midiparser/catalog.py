@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import hashlib
+from typing import List, Optional
+from dataclasses import dataclass, field
+from . corpus import parseCorpus
+from . metadata import scanMetadata
+
+# A catalog keeps the metadata of every MIDI file under a directory tree in a
+# SQLite database. Updates only scan files whose size or modification time
+# changed, and with hashing enabled, files whose content did not change are
+# not scanned again even if they were touched. Files that fail to parse are
+# kept with their error, so they are not retried until they change.
+
+schema = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    hash TEXT,
+    error TEXT,
+    midiFormat INTEGER,
+    tracksCount INTEGER,
+    ppqn INTEGER,
+    duration REAL,
+    totalTicks INTEGER,
+    minTempo REAL,
+    maxTempo REAL,
+    eventsCount INTEGER,
+    notesCount INTEGER,
+    lowestPitch INTEGER,
+    highestPitch INTEGER
+);
+CREATE TABLE IF NOT EXISTS trackNames (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    trackIndex INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS instrumentNames (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS programs (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    channel INTEGER NOT NULL,
+    program INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trackNamesByPath ON trackNames(path);
+CREATE INDEX IF NOT EXISTS instrumentNamesByPath ON instrumentNames(path);
+CREATE INDEX IF NOT EXISTS programsByPath ON programs(path);
+CREATE INDEX IF NOT EXISTS programsByProgram ON programs(program);
+"""
+
+metadataColumns = ("midiFormat", "tracksCount", "ppqn", "duration", "totalTicks", "minTempo", "maxTempo",
+                   "eventsCount", "notesCount", "lowestPitch", "highestPitch")
+
+@dataclass
+class CatalogEntry:
+    path: str
+    size: int
+    error: Optional[str] = None
+    midiFormat: Optional[int] = None
+    tracksCount: Optional[int] = None
+    ppqn: Optional[int] = None
+    duration: Optional[float] = None
+    totalTicks: Optional[int] = None
+    minTempo: Optional[float] = None
+    maxTempo: Optional[float] = None
+    eventsCount: Optional[int] = None
+    notesCount: Optional[int] = None
+    lowestPitch: Optional[int] = None
+    highestPitch: Optional[int] = None
+    trackNames: List[str] = field(default_factory = list)
+    instrumentNames: List[str] = field(default_factory = list)
+    programs: List[int] = field(default_factory = list)
+
+@dataclass
+class CatalogUpdate:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+
+def fileHash(filePath):
+    with open(filePath, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size = 20).hexdigest()
+
+def tempoRange(metadata):
+    # Tempos are stored in beats per minute, and files play at the default
+    # 120 BPM until their first tempo event.
+    tempos = [tempo for tick, tempo in metadata.tempoChanges]
+    if not any(tick == 0 for tick, tempo in metadata.tempoChanges): tempos.append(500000)
+    return 6e7 / max(tempos), 6e7 / min(tempos)
+
+class Catalog:
+    def __init__(self, databasePath, useHash = False):
+        self.connection = sqlite3.connect(os.fspath(databasePath))
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(schema)
+        self.useHash = useHash
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def findFiles(self, root, suffixes):
+        for directory, directoryNames, fileNames in os.walk(root):
+            directoryNames.sort()
+            for fileName in sorted(fileNames):
+                if fileName.lower().endswith(suffixes):
+                    yield os.path.join(directory, fileName)
+
+    def update(self, root, workers = 1, suffixes = (".mid", ".midi"), onProgress = None):
+        root = os.path.abspath(root)
+        update = CatalogUpdate()
+        known = {path : (size, mtime, hash) for path, size, mtime, hash in
+            self.connection.execute("SELECT path, size, mtime, hash FROM files")
+            if path.startswith(root + os.sep)}
+
+        changed = {}
+        for path in self.findFiles(root, suffixes):
+            status = os.stat(path)
+            identity = known.pop(path, None)
+            if identity is not None and identity[:2] == (status.st_size, status.st_mtime_ns):
+                update.unchanged += 1
+                continue
+            hash = fileHash(path) if self.useHash else None
+            if identity is not None and hash is not None and hash == identity[2]:
+                self.connection.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?",
+                                        (status.st_size, status.st_mtime_ns, path))
+                update.unchanged += 1
+                continue
+            changed[path] = (status, hash, identity is not None)
+
+        with self.connection:
+            for result in parseCorpus(list(changed), workers, scanMetadata, onProgress):
+                status, hash, isKnown = changed[result.path]
+                self.store(result.path, status, hash, result.value, result.error)
+                update.updated += isKnown
+                update.added += not isKnown
+                update.failed += not result.ok
+            for path in known:
+                self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+            update.removed = len(known)
+        return update
+
+    def store(self, path, status, hash, metadata, error):
+        self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        values = dict.fromkeys(metadataColumns)
+        if metadata is not None:
+            values.update({name : getattr(metadata, name, None) for name in metadataColumns})
+            values["minTempo"], values["maxTempo"] = tempoRange(metadata)
+        self.connection.execute(
+            f"INSERT INTO files (path, size, mtime, hash, error, {', '.join(metadataColumns)}) "
+            f"VALUES ({', '.join('?' * (5 + len(metadataColumns)))})",
+            (path, status.st_size, status.st_mtime_ns, hash, error, *values.values()))
+        if metadata is None: return
+        self.connection.executemany("INSERT INTO trackNames VALUES (?, ?, ?)",
+            [(path, i, name) for i, name in enumerate(metadata.trackNames) if name is not None])
+        self.connection.executemany("INSERT INTO instrumentNames VALUES (?, ?)",
+            [(path, name) for name in metadata.instrumentNames])
+        self.connection.executemany("INSERT INTO programs VALUES (?, ?, ?)",
+            [(path, channel, program) for channel, programs in metadata.programs.items() for program in programs])
+
+    def entries(self, where = "", parameters = ()):
+        rows = self.connection.execute(
+            f"SELECT path, size, error, {', '.join(metadataColumns)} FROM files {where} ORDER BY path", parameters)
+        entries = [CatalogEntry(*row) for row in rows]
+        for entry in entries:
+            entry.trackNames = [name for name, in self.connection.execute(
+                "SELECT name FROM trackNames WHERE path = ? ORDER BY trackIndex", (entry.path,))]
+            entry.instrumentNames = [name for name, in self.connection.execute(
+                "SELECT name FROM instrumentNames WHERE path = ?", (entry.path,))]
+            entry.programs = [program for program, in self.connection.execute(
+                "SELECT DISTINCT program FROM programs WHERE path = ? ORDER BY program", (entry.path,))]
+        return entries
+
+    def entry(self, path):
+        entries = self.entries("WHERE path = ?", (os.path.abspath(path),))
+        return entries[0] if entries else None
+
+    def query(self, minDuration = None, maxDuration = None, minTempo = None, maxTempo = None,
+              ppqn = None, midiFormat = None, program = None, instrument = None, trackName = None,
+              minNotes = None, minPitch = None, maxPitch = None, errors = False):
+        # Tempo bounds match files whose tempo range overlaps them, and pitch
+        # bounds match files whose notes all lie within them.
+        conditions = ["error IS NOT NULL" if errors else "error IS NULL"]
+        parameters = []
+        for condition, value in (
+            ("duration >= ?", minDuration),
+            ("duration <= ?", maxDuration),
+            ("maxTempo >= ?", minTempo),
+            ("minTempo <= ?", maxTempo),
+            ("ppqn = ?", ppqn),
+            ("midiFormat = ?", midiFormat),
+            ("notesCount >= ?", minNotes),
+            ("lowestPitch >= ?", minPitch),
+            ("highestPitch <= ?", maxPitch),
+            ("path IN (SELECT path FROM programs WHERE program = ?)", program),
+            ("path IN (SELECT path FROM instrumentNames WHERE name LIKE ?)", instrument and f"%{instrument}%"),
+            ("path IN (SELECT path FROM trackNames WHERE name LIKE ?)", trackName and f"%{trackName}%"),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        return self.entries("WHERE " + " AND ".join(conditions), parameters)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,365 @@
+import mmap
+import numpy
+from array import array
+from typing import Dict, List
+from dataclasses import dataclass
+from . parser import *
+
+# Channel events keep their status high nibble in the status column, their
+# channel in the channel column and their data bytes in data1 and data2. Meta
+# events use the 0xFF status with the meta type in data1, SysEx events use the
+# 0xF0 or 0xF7 status. The payloads of meta and SysEx events are kept in a side
+# table that maps the event index to the raw payload bytes.
+
+# The bulk decoder finds event boundaries without a loop over events. Every
+# byte position p of a chunk, paired with the data size c of the running
+# status in effect (0 when there is no usable channel running status), is a
+# node whose successor is the start of the next event and its running status
+# size. The successors of all nodes are computed with array operations, and
+# the path from the first byte is followed with a few rounds of pointer
+# doubling, so Python only steps once per block of events. Tracks the bulk
+# decoder does not handle, like data bytes after a meta or SysEx status, VLQs
+# over four bytes or a missing end of track, are decoded by the scalar path.
+
+# The array operations have a fixed cost that only pays off on long chunks,
+# the bulk decoder overtakes the scalar one at around a thousand events. Chunks
+# shorter than bulkChunkLength bytes are decoded by the scalar path.
+bulkChunkLength = 4096
+
+channelDataSizes = numpy.zeros(256, dtype = numpy.int32)
+for status, size in channelDataSizeByStatus.items():
+    channelDataSizes[status : status + 16] = size
+
+def decodeVLQs(data, vlqEnds, positions):
+    ends = vlqEnds[positions]
+    values = numpy.zeros(len(positions), dtype = numpy.int64)
+    for i in range(4):
+        inside = positions + i <= ends
+        values = numpy.where(inside, (values << 7) | (data[numpy.minimum(positions + i, len(data) - 1)] & 0x7F), values)
+    return values, ends + 1, ends - positions >= 4
+
+def findEvents(data, chunkLength, strideLevels = 3):
+    n = chunkLength
+    if n == 0: return None
+    vlqEnds = numpy.where(data < 0x80, numpy.arange(len(data), dtype = numpy.int32), len(data) - 1)
+    vlqEnds = numpy.minimum.accumulate(vlqEnds[::-1])[::-1]
+    statusPositions = vlqEnds[:n] + 1
+    shortDeltas = statusPositions - numpy.arange(n, dtype = numpy.int32) <= 4
+    statusBytes = data[statusPositions]
+    explicit = statusBytes >= 0x80
+    sizes = channelDataSizes[statusBytes]
+    nextPositions = statusPositions + 1 + sizes
+    supported = shortDeltas & (sizes > 0)
+
+    # Meta and SysEx lengths are only decoded where such a status could start.
+    isMeta = statusBytes == 0xFF
+    payloadPositions = numpy.flatnonzero(isMeta | (statusBytes == 0xF0) | (statusBytes == 0xF7))
+    lengthPositions = statusPositions[payloadPositions] + 1 + isMeta[payloadPositions]
+    lengths, payloadStarts, longLengths = decodeVLQs(data, vlqEnds, lengthPositions)
+    nextPositions[payloadPositions] = numpy.minimum(payloadStarts + lengths, n + 1)
+    supported[payloadPositions] = shortDeltas[payloadPositions] & ~longLengths
+
+    sink, invalid = 3 * n, 3 * n + 1
+    explicitNodes = numpy.where(supported & (nextPositions < n), nextPositions * 3 + sizes, invalid)
+    isEnd = isMeta[payloadPositions] & (data[statusPositions[payloadPositions] + 1] == 0x2F)
+    endPositions = payloadPositions[isEnd & supported[payloadPositions] & (nextPositions[payloadPositions] <= n)]
+    explicitNodes[endPositions] = sink
+    successors = numpy.empty(3 * n + 2, dtype = numpy.int32)
+    successors[sink], successors[invalid] = sink, invalid
+    successors[0 : 3 * n : 3] = numpy.where(explicit, explicitNodes, invalid)
+    for size in (1, 2):
+        runningPositions = statusPositions + size
+        runningNodes = numpy.where(shortDeltas & (runningPositions < n), runningPositions * 3 + size, invalid)
+        successors[size : 3 * n : 3] = numpy.where(explicit, explicitNodes, runningNodes)
+
+    # Jump 2**strideLevels events at a time, walk the strided jumps to find
+    # every 2**strideLevels-th event, then fill the events in between from
+    # those anchors in a few small gathers.
+    jumps = successors
+    for level in range(strideLevels):
+        jumps = jumps[jumps]
+    anchors = []
+    node = 0
+    while node < sink:
+        anchors.append(node)
+        node = int(jumps[node])
+    block = numpy.array(anchors, dtype = numpy.int32)
+    blocks = [block]
+    for i in range((1 << strideLevels) - 1):
+        block = successors[block]
+        blocks.append(block)
+    path = numpy.append(numpy.stack(blocks, axis = 1).ravel(), node)
+    last = numpy.argmax(path >= sink)
+    if path[last] == invalid: return None
+    return path[:last] // 3, vlqEnds
+
+@dataclass(eq = False)
+class TrackArrays:
+    deltaTime: numpy.ndarray
+    tick: numpy.ndarray
+    status: numpy.ndarray
+    channel: numpy.ndarray
+    data1: numpy.ndarray
+    data2: numpy.ndarray
+    payloads: Dict[int, bytes]
+
+    def __len__(self):
+        return len(self.deltaTime)
+
+    @classmethod
+    def fromColumns(cls, deltaTime, status, channel, data1, data2, payloads):
+        deltaTime = numpy.asarray(deltaTime, dtype = numpy.uint32)
+        tick = numpy.cumsum(deltaTime, dtype = numpy.int64)
+        status = numpy.asarray(status, dtype = numpy.uint8)
+        channel = numpy.asarray(channel, dtype = numpy.uint8)
+        data1 = numpy.asarray(data1, dtype = numpy.uint8)
+        data2 = numpy.asarray(data2, dtype = numpy.uint8)
+        return cls(deltaTime, tick, status, channel, data1, data2, payloads)
+
+    @classmethod
+    def fromEvents(cls, events):
+        deltaTime, status, channel = array("I"), array("B"), array("B")
+        data1, data2 = array("B"), array("B")
+        payloads = {}
+        for index, event in enumerate(events):
+            eventClass = type(event)
+            deltaTime.append(event.deltaTime)
+            if eventClass in statusByChannelEvent:
+                dataFields = channelDataFieldsByEvent[eventClass]
+                status.append(statusByChannelEvent[eventClass])
+                channel.append(event.channel)
+                data1.append(getattr(event, dataFields[0]))
+                data2.append(getattr(event, dataFields[1]) if len(dataFields) == 2 else 0)
+                continue
+            if eventClass in metaTypeByEvent:
+                status.append(0xFF)
+                data1.append(metaTypeByEvent[eventClass])
+            else:
+                status.append(0xF0 if eventClass is SysExEvent else 0xF7)
+                data1.append(0)
+            channel.append(0)
+            data2.append(0)
+            payloads[index] = event.toPayload()
+        return cls.fromColumns(deltaTime, status, channel, data1, data2, payloads)
+
+    @classmethod
+    def fromBuffer(cls, buffer, offset):
+        deltaTime, status, channel = array("I"), array("B"), array("B")
+        data1, data2 = array("B"), array("B")
+        payloads = {}
+        runningStatus = 0
+        while True:
+            value, offset = decodeVLQ(buffer, offset)
+            deltaTime.append(value)
+            if buffer[offset] & 0x80:
+                runningStatus = buffer[offset]
+                offset += 1
+
+            if runningStatus == 0xFF:
+                eventType = buffer[offset]
+                length, offset = decodeVLQ(buffer, offset + 1)
+                payloads[len(status)] = buffer[offset : offset + length]
+                offset += length
+                status.append(0xFF)
+                channel.append(0)
+                data1.append(eventType)
+                data2.append(0)
+                if eventType == 0x2F: break
+            elif runningStatus == 0xF0 or runningStatus == 0xF7:
+                length, offset = decodeVLQ(buffer, offset)
+                payloads[len(status)] = buffer[offset : offset + length]
+                offset += length
+                status.append(runningStatus)
+                channel.append(0)
+                data1.append(0)
+                data2.append(0)
+            else:
+                eventStatus = runningStatus & 0xF0
+                channel.append(runningStatus & 0xF)
+                data1.append(buffer[offset])
+                if channelDataSizeByStatus[eventStatus] == 2:
+                    data2.append(buffer[offset + 1])
+                    if eventStatus == 0x90 and buffer[offset + 1] == 0: eventStatus = 0x80
+                    offset += 2
+                else:
+                    data2.append(0)
+                    offset += 1
+                status.append(eventStatus)
+        return cls.fromColumns(deltaTime, status, channel, data1, data2, payloads)
+
+    @classmethod
+    def fromChunk(cls, buffer, offset, chunkLength, minimumLength = bulkChunkLength):
+        if chunkLength < minimumLength: return cls.fromBuffer(buffer, offset)
+        data = numpy.zeros(chunkLength + 8, dtype = numpy.uint8)
+        data[:chunkLength] = numpy.frombuffer(buffer, dtype = numpy.uint8, count = chunkLength, offset = offset)
+        events = findEvents(data, chunkLength)
+        if events is None: return cls.fromBuffer(buffer, offset)
+        starts, vlqEnds = events
+
+        deltaTime, statusPositions, longDeltas = decodeVLQs(data, vlqEnds, starts)
+        explicit = data[statusPositions] >= 0x80
+        # Forward fill the last explicit status into the events using running status.
+        lastExplicit = numpy.maximum.accumulate(numpy.where(explicit, numpy.arange(len(starts)), 0))
+        runningStatus = data[statusPositions][lastExplicit].astype(numpy.int64)
+        dataPositions = statusPositions + explicit
+        isChannel = runningStatus < 0xF0
+        isMeta = runningStatus == 0xFF
+        kind = runningStatus & 0xF0
+        data1 = numpy.where(isChannel, data[dataPositions], numpy.where(isMeta, data[statusPositions + 1], 0))
+        data2 = numpy.where(isChannel & (channelDataSizes[runningStatus] == 2), data[dataPositions + 1], 0)
+        status = numpy.where(isChannel, numpy.where((kind == 0x90) & (data2 == 0), 0x80, kind), runningStatus)
+        channel = numpy.where(isChannel, runningStatus & 0xF, 0)
+
+        payloads = {}
+        payloadEvents = numpy.flatnonzero(~isChannel)
+        lengths, payloadStarts, longLengths = decodeVLQs(
+            data, vlqEnds, statusPositions[payloadEvents] + 1 + isMeta[payloadEvents])
+        payloadStarts += offset
+        for index, start, end in zip(payloadEvents.tolist(), payloadStarts.tolist(), (payloadStarts + lengths).tolist()):
+            payloads[index] = buffer[start : end]
+        return cls.fromColumns(deltaTime, status, channel, data1, data2, payloads)
+
+    def toEvents(self):
+        events = []
+        payloads = self.payloads
+        rows = zip(self.deltaTime.tolist(), self.status.tolist(), self.channel.tolist(),
+                   self.data1.tolist(), self.data2.tolist())
+        for index, (deltaTime, status, channel, data1, data2) in enumerate(rows):
+            if status == 0xFF:
+                payload = payloads[index]
+                events.append(metaDecoderByType[data1](deltaTime, payload, 0, len(payload)))
+            elif status == 0xF0 or status == 0xF7:
+                eventClass = SysExEvent if status == 0xF0 else EscapeSequenceEvent
+                events.append(eventClass(deltaTime, bytes(payloads[index])))
+            elif channelDataSizeByStatus[status] == 2:
+                events.append(channelEventByStatus[status](deltaTime, channel, data1, data2))
+            else:
+                events.append(channelEventByStatus[status](deltaTime, channel, data1))
+        return events
+
+    def toTrack(self):
+        return MidiTrack(self.toEvents())
+
+@dataclass(eq = False)
+class NoteArrays:
+    start: numpy.ndarray
+    end: numpy.ndarray
+    channel: numpy.ndarray
+    pitch: numpy.ndarray
+    velocity: numpy.ndarray
+    track: numpy.ndarray
+
+    def __len__(self):
+        return len(self.start)
+
+    @classmethod
+    def fromTrackArrays(cls, track, trackIndex = 0):
+        # Notes are paired first in, first out per channel and pitch, like
+        # extractTrackNotes. Note events are grouped by key, and within a group
+        # the number of pending notes follows p = max(0, p + on - off), whose
+        # closed form is the on minus off count less its running minimum. The
+        # k-th note-off that finds a pending note closes the k-th note-on.
+        status, data2 = track.status, track.data2
+        isOn = (status == 0x90) & (data2 > 0)
+        isOff = (status == 0x80) | ((status == 0x90) & (data2 == 0))
+        positions = numpy.flatnonzero(isOn | isOff)
+        key = track.channel[positions].astype(numpy.int64) * 128 + track.data1[positions]
+        order = numpy.argsort(key, kind = "stable")
+        positions, key = positions[order], key[order]
+        on = isOn[positions]
+
+        groupStart = numpy.ones(len(key), dtype = bool)
+        groupStart[1:] = key[1:] != key[:-1]
+        groupId = numpy.cumsum(groupStart) - 1
+        onsCount = numpy.cumsum(on)
+        offsCount = numpy.cumsum(~on)
+        onsBefore = (onsCount - on)[groupStart]
+        offsBefore = (offsCount - ~on)[groupStart]
+        groupOns = onsCount - onsBefore[groupId]
+        balance = groupOns - (offsCount - offsBefore[groupId])
+        # Offset every group below the previous ones so the running minimum restarts.
+        spacing = 2 * len(key) + 2
+        runningMinimum = numpy.minimum.accumulate(balance - groupId * spacing) + groupId * spacing
+        closed = groupOns - (balance - numpy.minimum(runningMinimum, 0))
+        previousClosed = numpy.zeros_like(closed)
+        previousClosed[1:] = closed[:-1]
+        previousClosed[groupStart] = 0
+        closing = ~on & (closed > previousClosed)
+
+        onPositions = positions[on]
+        end = numpy.full(len(onPositions), track.tick[-1] if len(track) else 0, dtype = numpy.int64)
+        end[onsBefore[groupId[closing]] + closed[closing] - 1] = track.tick[positions[closing]]
+        order = numpy.argsort(onPositions, kind = "stable")
+        onPositions = onPositions[order]
+        return cls(track.tick[onPositions], end[order], track.channel[onPositions],
+                   track.data1[onPositions], track.data2[onPositions],
+                   numpy.full(len(onPositions), trackIndex, dtype = numpy.uint16))
+
+    @classmethod
+    def fromMidiFileArrays(cls, midiFileArrays):
+        trackNotes = [cls.fromTrackArrays(track, i) for i, track in enumerate(midiFileArrays.tracks)]
+        # An empty track keeps the column types when the file has no tracks.
+        trackNotes.append(cls.fromTrackArrays(TrackArrays.fromColumns([], [], [], [], [], {})))
+        columns = [numpy.concatenate([getattr(notes, name) for notes in trackNotes])
+            for name in ("start", "end", "channel", "pitch", "velocity", "track")]
+        order = numpy.lexsort((columns[5], columns[0]))
+        return cls(*[column[order] for column in columns])
+
+@dataclass(eq = False)
+class MidiFileArrays:
+    midiFormat: int
+    ppqn: int
+    tracks: List[TrackArrays]
+
+    @classmethod
+    def fromMidiFile(cls, midiFile):
+        tracks = [TrackArrays.fromEvents(track.events) for track in midiFile.tracks]
+        return cls(midiFile.midiFormat, midiFile.ppqn, tracks)
+
+    @classmethod
+    def fromFile(cls, filePath):
+        with open(filePath, "rb") as f:
+            memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            midiFormat, tracksCount, ppqn, offset = decodeHeader(memoryMap)
+            trackIndex = decodeTrackIndex(memoryMap, offset, tracksCount)
+            tracks = [TrackArrays.fromChunk(memoryMap, offset, chunkLength) for offset, chunkLength in trackIndex]
+            memoryMap.close()
+            return cls(midiFormat, ppqn, tracks)
+
+    def toMidiFile(self):
+        return MidiFile(self.midiFormat, self.ppqn, [track.toTrack() for track in self.tracks])
+
+    def notes(self):
+        return NoteArrays.fromMidiFileArrays(self)
+
+    def tempoMap(self):
+        from . tempo import TempoMap
+        tempoChanges = []
+        for track in self.tracks:
+            for index in numpy.flatnonzero((track.status == 0xFF) & (track.data1 == 0x51)).tolist():
+                tempoChanges.append((int(track.tick[index]), int.from_bytes(track.payloads[index][:3], "big")))
+        return TempoMap(self.ppqn, tempoChanges)
+
+    def merged(self):
+        lengths = [len(track) for track in self.tracks]
+        trackIndex = numpy.repeat(numpy.arange(len(self.tracks)), lengths)
+        tick = numpy.concatenate([track.tick for track in self.tracks])
+        order = numpy.argsort(tick, kind = "stable")
+        rowByOrder = numpy.empty_like(order)
+        rowByOrder[order] = numpy.arange(len(order))
+        payloads = {}
+        offset = 0
+        for track, length in zip(self.tracks, lengths):
+            for index, payload in track.payloads.items():
+                payloads[int(rowByOrder[offset + index])] = payload
+            offset += length
+
+        def column(name):
+            return numpy.concatenate([getattr(track, name) for track in self.tracks])[order]
+
+        tick = tick[order]
+        deltaTime = numpy.diff(tick, prepend = 0).astype(numpy.uint32)
+        arrays = TrackArrays(deltaTime, tick, column("status"), column("channel"),
+                             column("data1"), column("data2"), payloads)
+        return arrays, trackIndex[order]
+
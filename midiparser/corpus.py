@@ -0,0 +1,140 @@
+import os
+import time
+from typing import Any, Optional
+from dataclasses import dataclass
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from . parser import CompactMidiFile
+
+@dataclass
+class CorpusResult:
+    path: str
+    value: Any
+    error: Optional[str]
+    size: int
+
+    @property
+    def ok(self):
+        return self.error is None
+
+@dataclass
+class CorpusProgress:
+    filesDone: int = 0
+    filesFailed: int = 0
+    bytesParsed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def filesPerSecond(self):
+        return self.filesDone / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def megabytesPerSecond(self):
+        return self.bytesParsed / self.elapsed / 1e6 if self.elapsed else 0.0
+
+def parseCorpusFile(function, path):
+    path = os.fspath(path)
+    try:
+        size = os.path.getsize(path)
+    except OSError as exception:
+        return CorpusResult(path, None, f"{type(exception).__name__}: {exception}", 0)
+    try:
+        return CorpusResult(path, function(path), None, size)
+    except Exception as exception:
+        return CorpusResult(path, None, f"{type(exception).__name__}: {exception}", size)
+
+def parseCorpus(paths, workers = None, function = CompactMidiFile.fromFile, onProgress = None):
+    # The value function returns is pickled back to this process, and for
+    # lists of event objects that costs more than parsing the file here. So
+    # function should reduce a file to something small, like the metadata of
+    # the catalog. By default files come back as CompactMidiFile objects,
+    # whose toMidiFile method rebuilds the events.
+    progress = CorpusProgress()
+    start = time.perf_counter()
+
+    def update(result):
+        progress.filesDone += 1
+        progress.filesFailed += not result.ok
+        progress.bytesParsed += result.size
+        progress.elapsed = time.perf_counter() - start
+        if onProgress is not None: onProgress(progress)
+
+    if workers == 1:
+        for path in paths:
+            result = parseCorpusFile(function, path)
+            update(result)
+            yield result
+        return
+
+    workers = workers or os.cpu_count() or 1
+    paths = iter(paths)
+    pending = {}
+    suspects = []
+    executor = ProcessPoolExecutor(max_workers = workers)
+    broken = False
+
+    # Keep a bounded number of files in flight, so huge path lists are
+    # consumed lazily and results stream back as soon as they finish.
+    def submit():
+        nonlocal paths, broken
+        for path in paths:
+            try:
+                pending[executor.submit(parseCorpusFile, function, path)] = path
+            except BrokenProcessPool:
+                paths = chain([path], paths)
+                broken = True
+                return
+            if len(pending) >= 4 * workers: break
+
+    def failed(path, error):
+        return CorpusResult(os.fspath(path), None, error, 0)
+
+    def restart():
+        nonlocal executor
+        executor.shutdown(wait = False, cancel_futures = True)
+        executor = ProcessPoolExecutor(max_workers = workers)
+
+    def isolate(path):
+        try:
+            return executor.submit(parseCorpusFile, function, path).result()
+        except BrokenProcessPool:
+            restart()
+            return failed(path, "BrokenProcessPool: a worker process died")
+        except Exception as exception:
+            return failed(path, f"{type(exception).__name__}: {exception}")
+
+    try:
+        submit()
+        while pending or broken:
+            if pending:
+                done, notDone = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.append(path)
+                        continue
+                    except Exception as exception:
+                        result = failed(path, f"{type(exception).__name__}: {exception}")
+                    update(result)
+                    yield result
+            if broken:
+                # A worker that dies, killed for memory or crashed, takes the
+                # pool down with every file in flight. Parse those files again
+                # one at a time in a fresh pool, so only the file that kills a
+                # worker on its own is reported as failed.
+                suspects.extend(pending.values())
+                pending.clear()
+                restart()
+                broken = False
+                for path in suspects:
+                    result = isolate(path)
+                    update(result)
+                    yield result
+                suspects.clear()
+            submit()
+    finally:
+        executor.shutdown(wait = True, cancel_futures = True)
@@ -0,0 +1,135 @@
+import struct
+from . events import *
+
+# An offset based decoder that works directly on any indexable buffer, such as
+# bytes, bytearray, mmap or memoryview objects. Every function takes the buffer
+# and an integer offset and returns the decoded value along with the offset that
+# follows it. Payloads are slices of the buffer, so decoding a memoryview does
+# not copy SysEx and sequencer data.
+
+headerStruct = struct.Struct(">4sIHHH")
+chunkHeaderStruct = struct.Struct(">4sI")
+uint16Struct = struct.Struct(">H")
+smpteOffsetStruct = struct.Struct("5B")
+timeSignatureStruct = struct.Struct("4B")
+keySignatureStruct = struct.Struct("2B")
+
+def decodeHeader(buffer, offset = 0):
+    identifier, chunkLength, midiFormat, tracksCount, ppqn = headerStruct.unpack_from(buffer, offset)
+    return midiFormat, tracksCount, ppqn, offset + 8 + chunkLength
+
+def decodeTrackIndex(buffer, offset, tracksCount):
+    trackIndex = []
+    for i in range(tracksCount):
+        identifier, chunkLength = chunkHeaderStruct.unpack_from(buffer, offset)
+        trackIndex.append((offset + 8, chunkLength))
+        offset += 8 + chunkLength
+    return trackIndex
+
+def decodeVLQ(buffer, offset):
+    byte = buffer[offset]
+    offset += 1
+    total = byte & 0x7F
+    while byte & 0x80:
+        byte = buffer[offset]
+        offset += 1
+        total = (total << 7) | (byte & 0x7F)
+    return total, offset
+
+def textDecoder(eventClass):
+    def decode(deltaTime, buffer, start, end):
+        return eventClass(deltaTime, str(buffer[start:end], "latin_1"))
+    return decode
+
+metaDecoderByType = {
+    0x00 : lambda deltaTime, buffer, start, end:
+        SequenceNumberEvent(deltaTime, uint16Struct.unpack_from(buffer, start)[0]),
+    0x01 : textDecoder(TextEvent),
+    0x02 : textDecoder(CopyrightEvent),
+    0x03 : textDecoder(TrackNameEvent),
+    0x04 : textDecoder(InstrumentNameEvent),
+    0x05 : textDecoder(LyricEvent),
+    0x06 : textDecoder(MarkerEvent),
+    0x07 : textDecoder(CuePointEvent),
+    0x08 : textDecoder(ProgramNameEvent),
+    0x09 : textDecoder(DeviceNameEvent),
+    0x20 : lambda deltaTime, buffer, start, end: MidiChannelPrefixEvent(deltaTime, buffer[start]),
+    0x21 : lambda deltaTime, buffer, start, end: MidiPortEvent(deltaTime, buffer[start]),
+    0x2F : lambda deltaTime, buffer, start, end: EndOfTrackEvent(deltaTime),
+    0x51 : lambda deltaTime, buffer, start, end:
+        TempoEvent(deltaTime, (buffer[start] << 16) | (buffer[start + 1] << 8) | buffer[start + 2]),
+    0x54 : lambda deltaTime, buffer, start, end:
+        SmpteOffsetEvent(deltaTime, *smpteOffsetStruct.unpack_from(buffer, start)),
+    0x58 : lambda deltaTime, buffer, start, end:
+        TimeSignatureEvent(deltaTime, *timeSignatureStruct.unpack_from(buffer, start)),
+    0x59 : lambda deltaTime, buffer, start, end:
+        KeySignatureEvent(deltaTime, *keySignatureStruct.unpack_from(buffer, start)),
+    0x7F : lambda deltaTime, buffer, start, end: SequencerEvent(deltaTime, buffer[start:end]),
+}
+
+twoByteChannelEventByStatus = {
+    0x80 : NoteOffEvent,
+    0xA0 : NotePressureEvent,
+    0xB0 : ControllerEvent,
+    0xE0 : PitchBendEvent,
+}
+
+oneByteChannelEventByStatus = {
+    0xC0 : ProgramEvent,
+    0xD0 : ChannelPressureEvent,
+}
+
+def decodeEvent(buffer, offset, parseState):
+    byte = buffer[offset]
+    offset += 1
+    deltaTime = byte & 0x7F
+    while byte & 0x80:
+        byte = buffer[offset]
+        offset += 1
+        deltaTime = (deltaTime << 7) | (byte & 0x7F)
+
+    status = buffer[offset]
+    if status & 0x80:
+        parseState.runningStatus = status
+        offset += 1
+    else:
+        status = parseState.runningStatus
+
+    if status < 0x80:
+        raise ValueError(f"Data byte without a running status at offset {offset}.")
+    elif status < 0xF0:
+        channel = status & 0xF
+        kind = status & 0xF0
+        if kind == 0x90:
+            note = buffer[offset]
+            velocity = buffer[offset + 1]
+            if velocity: return NoteOnEvent(deltaTime, channel, note, velocity), offset + 2
+            return NoteOffEvent(deltaTime, channel, note, 0), offset + 2
+        eventClass = twoByteChannelEventByStatus.get(kind)
+        if eventClass is not None:
+            return eventClass(deltaTime, channel, buffer[offset], buffer[offset + 1]), offset + 2
+        return oneByteChannelEventByStatus[kind](deltaTime, channel, buffer[offset]), offset + 1
+    elif status == 0xFF:
+        eventType = buffer[offset]
+        length, start = decodeVLQ(buffer, offset + 1)
+        end = start + length
+        if end > len(buffer):
+            raise EOFError(f"Meta event at offset {offset} exceeds the buffer.")
+        return metaDecoderByType[eventType](deltaTime, buffer, start, end), end
+    elif status == 0xF0 or status == 0xF7:
+        length, start = decodeVLQ(buffer, offset)
+        end = start + length
+        if end > len(buffer):
+            raise EOFError(f"SysEx event at offset {offset} exceeds the buffer.")
+        eventClass = SysExEvent if status == 0xF0 else EscapeSequenceEvent
+        return eventClass(deltaTime, buffer[start:end]), end
+    else:
+        raise ValueError(f"Unsupported status byte 0x{status:02X} at offset {offset}.")
+
+def decodeEvents(buffer, offset, parseState):
+    events = []
+    append = events.append
+    while True:
+        event, offset = decodeEvent(buffer, offset, parseState)
+        append(event)
+        if type(event) is EndOfTrackEvent: return events, offset
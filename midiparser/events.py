@@ -3,6 +3,7 @@ from dataclasses import dataclass
 
 @dataclass
 class NoteOnEvent:
+    __slots__ = ("deltaTime", "channel", "note", "velocity")
     deltaTime: int
     channel: int
     note: int
@@ -16,6 +17,7 @@ class NoteOnEvent:
 
 @dataclass
 class NoteOffEvent:
+    __slots__ = ("deltaTime", "channel", "note", "velocity")
     deltaTime: int
     channel: int
     note: int
@@ -29,6 +31,7 @@ class NoteOffEvent:
 
 @dataclass
 class NotePressureEvent:
+    __slots__ = ("deltaTime", "channel", "note", "pressure")
     deltaTime: int
     channel: int
     note: int
@@ -42,6 +45,7 @@ class NotePressureEvent:
 
 @dataclass
 class ControllerEvent:
+    __slots__ = ("deltaTime", "channel", "controller", "value")
     deltaTime: int
     channel: int
     controller: int
@@ -55,6 +59,7 @@ class ControllerEvent:
 
 @dataclass
 class ProgramEvent:
+    __slots__ = ("deltaTime", "channel", "program")
     deltaTime: int
     channel: int
     program: int
@@ -66,6 +71,7 @@ class ProgramEvent:
 
 @dataclass
 class ChannelPressureEvent:
+    __slots__ = ("deltaTime", "channel", "pressure")
     deltaTime: int
     channel: int
     pressure: int
@@ -77,6 +83,7 @@ class ChannelPressureEvent:
 
 @dataclass
 class PitchBendEvent:
+    __slots__ = ("deltaTime", "channel", "lsb", "msb")
     deltaTime: int
     channel: int
     lsb: int
@@ -90,6 +97,7 @@ class PitchBendEvent:
 
 @dataclass
 class SequenceNumberEvent:
+    __slots__ = ("deltaTime", "sequenceNumber")
     deltaTime: int
     sequenceNumber: int
 
@@ -98,8 +106,12 @@ class SequenceNumberEvent:
         sequenceNumber = struct.unpack(">H", memoryMap.read(2))[0]
         return cls(deltaTime, sequenceNumber)
 
+    def toPayload(self):
+        return struct.pack(">H", self.sequenceNumber)
+
 @dataclass
 class TextEvent:
+    __slots__ = ("deltaTime", "text")
     deltaTime: int
     text: str
 
@@ -108,8 +120,12 @@ class TextEvent:
         text = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, text)
 
+    def toPayload(self):
+        return self.text.encode("latin_1")
+
 @dataclass
 class CopyrightEvent:
+    __slots__ = ("deltaTime", "copyright")
     deltaTime: int
     copyright: str
 
@@ -118,8 +134,12 @@ class CopyrightEvent:
         copyright = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, copyright)
 
+    def toPayload(self):
+        return self.copyright.encode("latin_1")
+
 @dataclass
 class TrackNameEvent:
+    __slots__ = ("deltaTime", "name")
     deltaTime: int
     name: str
 
@@ -128,8 +148,12 @@ class TrackNameEvent:
         name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, name)
 
+    def toPayload(self):
+        return self.name.encode("latin_1")
+
 @dataclass
 class InstrumentNameEvent:
+    __slots__ = ("deltaTime", "name")
     deltaTime: int
     name: str
 
@@ -138,8 +162,12 @@ class InstrumentNameEvent:
         name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, name)
 
+    def toPayload(self):
+        return self.name.encode("latin_1")
+
 @dataclass
 class LyricEvent:
+    __slots__ = ("deltaTime", "lyric")
     deltaTime: int
     lyric: str
 
@@ -148,8 +176,12 @@ class LyricEvent:
         lyric = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, lyric)
 
+    def toPayload(self):
+        return self.lyric.encode("latin_1")
+
 @dataclass
 class MarkerEvent:
+    __slots__ = ("deltaTime", "marker")
     deltaTime: int
     marker: str
 
@@ -158,8 +190,12 @@ class MarkerEvent:
         marker = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, marker)
 
+    def toPayload(self):
+        return self.marker.encode("latin_1")
+
 @dataclass
 class CuePointEvent:
+    __slots__ = ("deltaTime", "cuePoint")
     deltaTime: int
     cuePoint: str
 
@@ -168,8 +204,12 @@ class CuePointEvent:
         cuePoint = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, cuePoint)
 
+    def toPayload(self):
+        return self.cuePoint.encode("latin_1")
+
 @dataclass
 class ProgramNameEvent:
+    __slots__ = ("deltaTime", "name")
     deltaTime: int
     name: str
 
@@ -178,8 +218,12 @@ class ProgramNameEvent:
         name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, name)
 
+    def toPayload(self):
+        return self.name.encode("latin_1")
+
 @dataclass
 class DeviceNameEvent:
+    __slots__ = ("deltaTime", "name")
     deltaTime: int
     name: str
 
@@ -188,8 +232,12 @@ class DeviceNameEvent:
         name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin_1")
         return cls(deltaTime, name)
 
+    def toPayload(self):
+        return self.name.encode("latin_1")
+
 @dataclass
 class MidiChannelPrefixEvent:
+    __slots__ = ("deltaTime", "prefix")
     deltaTime: int
     prefix: int
 
@@ -198,8 +246,12 @@ class MidiChannelPrefixEvent:
         prefix = struct.unpack("B", memoryMap.read(1))[0]
         return cls(deltaTime, prefix)
 
+    def toPayload(self):
+        return struct.pack("B", self.prefix)
+
 @dataclass
 class MidiPortEvent:
+    __slots__ = ("deltaTime", "port")
     deltaTime: int
     port: int
 
@@ -208,16 +260,24 @@ class MidiPortEvent:
         port = struct.unpack("B", memoryMap.read(1))[0]
         return cls(deltaTime, port)
 
+    def toPayload(self):
+        return struct.pack("B", self.port)
+
 @dataclass
 class EndOfTrackEvent:
+    __slots__ = ("deltaTime",)
     deltaTime: int
 
     @classmethod
     def fromMemoryMap(cls, deltaTime, length, memoryMap):
         return cls(deltaTime)
 
+    def toPayload(self):
+        return b""
+
 @dataclass
 class TempoEvent:
+    __slots__ = ("deltaTime", "tempo")
     deltaTime: int
     tempo: int
 
@@ -226,8 +286,12 @@ class TempoEvent:
         tempo = struct.unpack(">I", b"\x00" + memoryMap.read(3))[0]
         return cls(deltaTime, tempo)
 
+    def toPayload(self):
+        return struct.pack(">I", self.tempo)[1:]
+
 @dataclass
 class SmpteOffsetEvent:
+    __slots__ = ("deltaTime", "hours", "minutes", "seconds", "fps", "fractionalFrames")
     deltaTime: int
     hours: int
     minutes: int
@@ -244,8 +308,12 @@ class SmpteOffsetEvent:
         fractionalFrames = struct.unpack("B", memoryMap.read(1))[0]
         return cls(deltaTime, hours, minutes, seconds, fps, fractionalFrames)
 
+    def toPayload(self):
+        return struct.pack("BBBBB", self.hours, self.minutes, self.seconds, self.fps, self.fractionalFrames)
+
 @dataclass
 class TimeSignatureEvent:
+    __slots__ = ("deltaTime", "numerator", "denominator", "clocksPerClick", "thirtySecondPer24Clocks")
     deltaTime: int
     numerator: int
     denominator: int
@@ -260,8 +328,12 @@ class TimeSignatureEvent:
         thirtySecondPer24Clocks = struct.unpack("B", memoryMap.read(1))[0]
         return cls(deltaTime, numerator, denominator, clocksPerClick, thirtySecondPer24Clocks)
 
+    def toPayload(self):
+        return struct.pack("BBBB", self.numerator, self.denominator, self.clocksPerClick, self.thirtySecondPer24Clocks)
+
 @dataclass
 class KeySignatureEvent:
+    __slots__ = ("deltaTime", "flatsSharps", "majorMinor")
     deltaTime: int
     flatsSharps: int
     majorMinor: int
@@ -272,8 +344,12 @@ class KeySignatureEvent:
         majorMinor = struct.unpack("B", memoryMap.read(1))[0]
         return cls(deltaTime, flatsSharps, majorMinor)
 
+    def toPayload(self):
+        return struct.pack("BB", self.flatsSharps, self.majorMinor)
+
 @dataclass
 class SequencerEvent:
+    __slots__ = ("deltaTime", "data")
     deltaTime: int
     data: bytes
 
@@ -282,8 +358,12 @@ class SequencerEvent:
         data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
         return cls(deltaTime, data)
 
+    def toPayload(self):
+        return bytes(self.data)
+
 @dataclass
 class SysExEvent:
+    __slots__ = ("deltaTime", "data")
     deltaTime: int
     data: bytes
 
@@ -292,8 +372,12 @@ class SysExEvent:
         data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
         return cls(deltaTime, data)
 
+    def toPayload(self):
+        return bytes(self.data)
+
 @dataclass
 class EscapeSequenceEvent:
+    __slots__ = ("deltaTime", "data")
     deltaTime: int
     data: bytes
 
@@ -302,3 +386,5 @@ class EscapeSequenceEvent:
         data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
         return cls(deltaTime, data)
 
+    def toPayload(self):
+        return bytes(self.data)
@@ -0,0 +1,151 @@
+import math
+import hashlib
+import numpy
+from os import PathLike
+from collections import defaultdict
+from dataclasses import dataclass
+from . parser import *
+from . stream import iterEvents
+
+# Fingerprints only look at note onsets, merged across tracks and channels.
+# Onsets at the same tick form a chord, and every chord becomes a token made
+# of its interval from the previous chord, its shape and the ratio of its
+# inter-onset interval to the previous one. None of these change under
+# transposition, tempo changes, a different ppqn or a different channel and
+# track layout. Runs of tokens are hashed into shingles, and the shingle set
+# is summarized with MinHash, whose signatures agree in a fraction of
+# positions that estimates the Jaccard similarity of the shingle sets.
+
+maxHash = 0xFFFFFFFF
+
+@dataclass(eq = False)
+class Fingerprint:
+    signature: numpy.ndarray
+    notesCount: int
+    shinglesCount: int
+
+    def similarity(self, other):
+        # Files without shingles all share the empty signature, but they have
+        # no notes in common to be similar in.
+        if not self.shinglesCount or not other.shinglesCount: return 0.0
+        return float(numpy.mean(self.signature == other.signature))
+
+def iterNoteOnsets(source):
+    # Paths and buffers go through the offset based decoder, which is much
+    # faster than the stream one, and only note ons are kept.
+    if isinstance(source, (str, PathLike)):
+        source = MidiFile.fromFile(source, eventTypes = {NoteOnEvent})
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        source = MidiFile.fromBuffer(source, eventTypes = {NoteOnEvent})
+    if isinstance(source, MidiFile):
+        for tick, trackIndex, event in source.iterMerged():
+            if type(event) is NoteOnEvent: yield tick, event.note
+        return
+    ticks = {}
+    for trackIndex, event in iterEvents(source, eventTypes = {NoteOnEvent}):
+        tick = ticks.get(trackIndex, 0) + event.deltaTime
+        ticks[trackIndex] = tick
+        if type(event) is NoteOnEvent: yield tick, event.note
+
+def noteTokens(onsets):
+    chords = defaultdict(set)
+    for tick, pitch in onsets:
+        chords[tick].add(pitch)
+    tokens = []
+    previousTick = previousInterval = previousLowest = None
+    for tick in sorted(chords):
+        pitches = sorted(chords[tick])
+        lowest = pitches[0]
+        shape = tuple(pitch - lowest for pitch in pitches)
+        step = None if previousLowest is None else lowest - previousLowest
+        interval = None if previousTick is None else tick - previousTick
+        # Inter-onset ratios are bucketed in half octaves of duration.
+        ratio = None
+        if interval is not None and previousInterval is not None:
+            ratio = max(-8, min(8, round(2 * math.log2(interval / previousInterval))))
+        tokens.append((step, shape, ratio))
+        previousTick, previousInterval, previousLowest = tick, interval, lowest
+    return tokens
+
+def shingleHash(shingle):
+    # Built in hashes of None and tuples differ between Python versions, so
+    # use a digest of the token text to keep stored signatures comparable.
+    return int.from_bytes(hashlib.blake2b(repr(shingle).encode("ascii"), digest_size = 8).digest(), "little")
+
+def shingleHashes(tokens, shingleSize):
+    # The first two tokens lack a step or a ratio, so they only open shingles.
+    size = min(shingleSize, len(tokens))
+    hashes = {shingleHash(tokens[i : i + size]) for i in range(len(tokens) - size + 1)} if size else set()
+    return numpy.fromiter(hashes, dtype = numpy.uint64, count = len(hashes))
+
+class MinHasher:
+    def __init__(self, permutationsCount = 128, seed = 1):
+        generator = numpy.random.default_rng(seed)
+        # Multiply-shift hashing, the products wrap around modulo 2**64.
+        self.multipliers = generator.integers(0, 1 << 63, permutationsCount, dtype = numpy.uint64) * 2 + 1
+        self.increments = generator.integers(0, 1 << 63, permutationsCount, dtype = numpy.uint64)
+        self.permutationsCount = permutationsCount
+
+    def signature(self, hashes):
+        if not len(hashes): return numpy.full(self.permutationsCount, maxHash, dtype = numpy.uint32)
+        with numpy.errstate(over = "ignore"):
+            values = (self.multipliers[:, None] * hashes[None, :] + self.increments[:, None]) >> numpy.uint64(32)
+        return values.min(axis = 1).astype(numpy.uint32)
+
+    def fingerprint(self, source, shingleSize = 4):
+        onsets = list(iterNoteOnsets(source))
+        hashes = shingleHashes(noteTokens(onsets), shingleSize)
+        return Fingerprint(self.signature(hashes), len(onsets), len(hashes))
+
+def fingerprint(source, shingleSize = 4, permutationsCount = 128, seed = 1):
+    return MinHasher(permutationsCount, seed).fingerprint(source, shingleSize)
+
+class LSHIndex:
+    # Signatures are cut into bands, and two files become candidates when any
+    # band matches exactly. With b bands of r rows, pairs of similarity s are
+    # found with probability 1 - (1 - s**r)**b.
+    def __init__(self, bandsCount = 32, permutationsCount = 128):
+        if permutationsCount % bandsCount:
+            raise ValueError("The permutations count must be a multiple of the bands count.")
+        self.bandsCount = bandsCount
+        self.rowsCount = permutationsCount // bandsCount
+        self.buckets = [defaultdict(list) for i in range(bandsCount)]
+        self.fingerprints = {}
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def bandKeys(self, fingerprint):
+        signature = fingerprint.signature
+        return [signature[i * self.rowsCount : (i + 1) * self.rowsCount].tobytes() for i in range(self.bandsCount)]
+
+    def add(self, key, fingerprint):
+        if key in self.fingerprints:
+            raise ValueError(f"Duplicate fingerprint key {key!r}.")
+        self.fingerprints[key] = fingerprint
+        # Empty fingerprints match nothing, so they are kept out of the buckets.
+        if not fingerprint.shinglesCount: return
+        for buckets, bandKey in zip(self.buckets, self.bandKeys(fingerprint)):
+            buckets[bandKey].append(key)
+
+    def candidates(self, fingerprint):
+        candidates = set()
+        if not fingerprint.shinglesCount: return candidates
+        for buckets, bandKey in zip(self.buckets, self.bandKeys(fingerprint)):
+            candidates.update(buckets.get(bandKey, ()))
+        return candidates
+
+    def query(self, fingerprint, threshold = 0.8):
+        matches = [(key, fingerprint.similarity(self.fingerprints[key])) for key in self.candidates(fingerprint)]
+        return sorted([match for match in matches if match[1] >= threshold], key = lambda match: -match[1])
+
+    def duplicates(self, threshold = 0.8):
+        pairs = set()
+        for buckets in self.buckets:
+            for keys in buckets.values():
+                for i, first in enumerate(keys):
+                    for second in keys[i + 1:]:
+                        pairs.add((first, second))
+        matches = [(first, second, self.fingerprints[first].similarity(self.fingerprints[second]))
+            for first, second in pairs]
+        return sorted([match for match in matches if match[2] >= threshold], key = lambda match: -match[2])
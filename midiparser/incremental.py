@@ -0,0 +1,93 @@
+from . parser import *
+
+# A push parser that does no I/O of its own. Bytes are handed to feed() in
+# chunks of any size, and every event that is complete is returned. Bytes of
+# an event that is cut by a chunk boundary, including a partial VLQ, stay in
+# the buffer until the rest arrives, and the running status is kept in the
+# parse state across feeds.
+
+dataEvents = (SequencerEvent, SysExEvent, EscapeSequenceEvent)
+
+class MidiPushParser:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offset = 0
+        # The stream position of the first byte in the buffer.
+        self.position = 0
+        self.parseState = MidiParseState()
+        self.midiFormat = None
+        self.tracksCount = None
+        self.ppqn = None
+        self.trackIndex = -1
+        self.chunkEnd = None
+        self.inTrack = False
+
+    @property
+    def done(self):
+        return self.tracksCount is not None and self.trackIndex + 1 >= self.tracksCount and self.chunkEnd is None
+
+    def feed(self, data):
+        self.buffer += data
+        events = []
+        while self.step(events): pass
+        del self.buffer[:self.offset]
+        self.position += self.offset
+        self.offset = 0
+        return events
+
+    def step(self, events):
+        buffer, offset = self.buffer, self.offset
+        available = len(buffer) - offset
+        if self.tracksCount is None:
+            if available < 8: return False
+            identifier, chunkLength = chunkHeaderStruct.unpack_from(buffer, offset)
+            if available < 8 + chunkLength: return False
+            self.midiFormat, self.tracksCount, self.ppqn, self.offset = decodeHeader(buffer, offset)
+            return True
+
+        if self.chunkEnd is not None and not self.inTrack:
+            # Skip whatever follows the end of track event within the chunk.
+            chunkEnd = self.chunkEnd - self.position
+            self.offset = min(chunkEnd, len(buffer))
+            if self.offset < chunkEnd: return False
+            self.chunkEnd = None
+            return True
+
+        if self.chunkEnd is None:
+            if self.done or available < 8: return False
+            identifier, chunkLength = chunkHeaderStruct.unpack_from(buffer, offset)
+            self.trackIndex += 1
+            self.chunkEnd = self.position + offset + 8 + chunkLength
+            self.inTrack = True
+            self.parseState = MidiParseState()
+            self.offset = offset + 8
+            return True
+
+        runningStatus = self.parseState.runningStatus
+        try:
+            event, offset = decodeEvent(buffer, offset, self.parseState)
+        except (IndexError, EOFError):
+            self.parseState.runningStatus = runningStatus
+            return False
+        if self.position + offset > self.chunkEnd:
+            raise ValueError(f"Event exceeds the chunk of track {self.trackIndex}.")
+        self.offset = offset
+        if type(event) in dataEvents:
+            # Slices of the bytearray buffer are bytearrays, keep payloads immutable.
+            event.data = bytes(event.data)
+        events.append((self.trackIndex, event))
+        if type(event) is EndOfTrackEvent: self.inTrack = False
+        return True
+
+    def close(self):
+        if not self.done:
+            raise EOFError("Unexpected end of MIDI stream.")
+
+async def iterEventsAsync(reader, chunkSize = 65536):
+    parser = MidiPushParser()
+    while True:
+        data = await reader.read(chunkSize)
+        if not data: break
+        for item in parser.feed(data):
+            yield item
+    parser.close()
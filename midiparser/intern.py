@@ -0,0 +1,165 @@
+import sys
+import mmap
+from array import array
+from operator import attrgetter
+from dataclasses import dataclass, field
+from typing import List
+from . parser import *
+
+# Interned tracks keep delta times and pool ids in two parallel arrays. The
+# pool stores every distinct message once, as its class and a tuple of its
+# field values, so the shared data can not be changed through any event. Track
+# and instrument names with the same text share one string. Reading a track
+# always creates fresh events, which callers are free to modify.
+
+def valuesGetter(eventClass):
+    names = eventClass.__slots__[1:]
+    if not names: return lambda event: ()
+    if len(names) == 1:
+        getter = attrgetter(names[0])
+        return lambda event: (getter(event),)
+    return attrgetter(*names)
+
+valuesGetterByEvent = {}
+
+def valueBytes(value):
+    # Small integers are cached by the interpreter and cost nothing per use.
+    if isinstance(value, int) and -5 <= value <= 256: return 0
+    return sys.getsizeof(value)
+
+def eventBytes(event):
+    return sys.getsizeof(event) + sum(valueBytes(getattr(event, name)) for name in event.__slots__)
+
+def entryBytes(entry):
+    eventClass, values = entry
+    return sys.getsizeof(entry) + sys.getsizeof(values) + sum(map(valueBytes, values))
+
+class EventPool:
+    def __init__(self):
+        self.entries = []
+        self.idByEntry = {}
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def intern(self, event):
+        eventClass = type(event)
+        getter = valuesGetterByEvent.get(eventClass)
+        if getter is None:
+            getter = valuesGetterByEvent[eventClass] = valuesGetter(eventClass)
+        entry = (eventClass, getter(event))
+        self.lookups += 1
+        eventId = self.idByEntry.get(entry)
+        if eventId is None:
+            eventId = self.idByEntry[entry] = len(self.entries)
+            self.entries.append(entry)
+        return eventId
+
+    def event(self, eventId, deltaTime):
+        eventClass, values = self.entries[eventId]
+        return eventClass(deltaTime, *values)
+
+    def bytes(self):
+        # The entry tuples are shared by the list and the dictionary keys, but
+        # every id past the small integers is an object of its own.
+        return (sys.getsizeof(self.entries) + sys.getsizeof(self.idByEntry) +
+                sum(map(entryBytes, self.entries)) + sum(map(valueBytes, self.idByEntry.values())))
+
+@dataclass(eq = False)
+class InternedTrack:
+    deltaTimes: array
+    eventIds: array
+    pool: EventPool = field(repr = False)
+
+    @classmethod
+    def fromEvents(cls, events, pool):
+        deltaTimes = array("I", [event.deltaTime for event in events])
+        return cls(deltaTimes, array("I", [pool.intern(event) for event in events]), pool)
+
+    @classmethod
+    def fromTrack(cls, track, pool):
+        return cls.fromEvents(track.events, pool)
+
+    def __len__(self):
+        return len(self.eventIds)
+
+    def __getitem__(self, index):
+        return self.pool.event(self.eventIds[index], self.deltaTimes[index])
+
+    def __iter__(self):
+        event = self.pool.event
+        for eventId, deltaTime in zip(self.eventIds, self.deltaTimes):
+            yield event(eventId, deltaTime)
+
+    def toEvents(self):
+        return list(self)
+
+    def toTrack(self):
+        return MidiTrack(self.toEvents())
+
+@dataclass
+class InternReport:
+    events: int
+    uniqueEvents: int
+    bytesBefore: int
+    bytesAfter: int
+
+    @property
+    def savedBytes(self):
+        return self.bytesBefore - self.bytesAfter
+
+    @property
+    def savedRatio(self):
+        return self.savedBytes / self.bytesBefore if self.bytesBefore else 0.0
+
+@dataclass(eq = False)
+class InternedMidiFile:
+    midiFormat: int
+    ppqn: int
+    tracks: List[InternedTrack]
+    pool: EventPool = field(default_factory = EventPool, repr = False)
+
+    @classmethod
+    def fromMidiFile(cls, midiFile, pool = None):
+        pool = EventPool() if pool is None else pool
+        tracks = [InternedTrack.fromTrack(track, pool) for track in midiFile.tracks]
+        return cls(midiFile.midiFormat, midiFile.ppqn, tracks, pool)
+
+    @classmethod
+    def fromFile(cls, filePath, pool = None, eventTypes = None):
+        # Tracks are interned as soon as they are decoded, so the full set of
+        # fresh events never exists at once.
+        pool = EventPool() if pool is None else pool
+        eventFilter = None if eventTypes is None else EventFilter(eventTypes)
+        with open(filePath, "rb") as f:
+            memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            midiFormat, tracksCount, ppqn, offset = decodeHeader(memoryMap)
+            tracks = []
+            for offset, chunkLength in decodeTrackIndex(memoryMap, offset, tracksCount):
+                track = MidiTrack.fromBuffer(memoryMap, offset, eventFilter)
+                tracks.append(InternedTrack.fromTrack(track, pool))
+            memoryMap.close()
+        return cls(midiFormat, ppqn, tracks, pool)
+
+    def toMidiFile(self):
+        return MidiFile(self.midiFormat, self.ppqn, [track.toTrack() for track in self.tracks])
+
+    def report(self):
+        # Before, every occurrence is its own event in a list of events. After,
+        # the tracks are two arrays each, and the pool is measured as a whole,
+        # so a pool shared with other files is counted in full.
+        sizes = {}
+        events = 0
+        bytesBefore = 0
+        bytesAfter = self.pool.bytes()
+        for track in self.tracks:
+            events += len(track)
+            bytesBefore += sys.getsizeof(list(range(len(track))))
+            bytesAfter += sys.getsizeof(track.deltaTimes) + sys.getsizeof(track.eventIds)
+            for eventId, deltaTime in zip(track.eventIds, track.deltaTimes):
+                size = sizes.get(eventId)
+                if size is None:
+                    size = sizes[eventId] = eventBytes(self.pool.event(eventId, 0))
+                bytesBefore += size + valueBytes(deltaTime)
+        return InternReport(events, len(sizes), bytesBefore, bytesAfter)
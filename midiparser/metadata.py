@@ -0,0 +1,115 @@
+import mmap
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from . parser import *
+from . tempo import TempoMap
+
+# A fast path for catalog indexing. Channel events only advance the cursor and
+# update a few counters, and only the meta events that end up in the summary
+# are created.
+
+@dataclass
+class MidiMetadata:
+    midiFormat: int
+    tracksCount: int
+    ppqn: int
+    trackNames: List[Optional[str]] = field(default_factory = list)
+    instrumentNames: List[str] = field(default_factory = list)
+    tempoChanges: List[Tuple[int, int]] = field(default_factory = list)
+    timeSignatures: List[Tuple[int, TimeSignatureEvent]] = field(default_factory = list)
+    keySignatures: List[Tuple[int, KeySignatureEvent]] = field(default_factory = list)
+    programs: Dict[int, Set[int]] = field(default_factory = dict)
+    eventsCount: int = 0
+    notesCount: int = 0
+    lowestPitch: Optional[int] = None
+    highestPitch: Optional[int] = None
+    totalTicks: int = 0
+    duration: float = 0.0
+
+def scanTrack(buffer, offset, metadata):
+    tick = 0
+    runningStatus = 0
+    eventsCount = 0
+    notesCount = 0
+    lowestPitch, highestPitch = 128, -1
+    trackName = None
+    programs = metadata.programs
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        deltaTime = byte & 0x7F
+        while byte & 0x80:
+            byte = buffer[offset]
+            offset += 1
+            deltaTime = (deltaTime << 7) | (byte & 0x7F)
+        tick += deltaTime
+        eventsCount += 1
+
+        status = buffer[offset]
+        if status & 0x80:
+            runningStatus = status
+            offset += 1
+
+        kind = runningStatus & 0xF0
+        if kind == 0x90:
+            if buffer[offset + 1]:
+                notesCount += 1
+                pitch = buffer[offset]
+                if pitch < lowestPitch: lowestPitch = pitch
+                if pitch > highestPitch: highestPitch = pitch
+            offset += 2
+        elif kind == 0xC0:
+            programs.setdefault(runningStatus & 0xF, set()).add(buffer[offset])
+            offset += 1
+        elif kind < 0xF0 and kind >= 0x80:
+            offset += channelDataSizeByStatus[kind]
+        elif runningStatus == 0xFF:
+            eventType = buffer[offset]
+            length, offset = decodeVLQ(buffer, offset + 1)
+            end = offset + length
+            if eventType == 0x2F:
+                break
+            elif eventType == 0x03:
+                if trackName is None: trackName = str(buffer[offset:end], "latin_1")
+            elif eventType == 0x04:
+                metadata.instrumentNames.append(str(buffer[offset:end], "latin_1"))
+            elif eventType == 0x51:
+                tempo = (buffer[offset] << 16) | (buffer[offset + 1] << 8) | buffer[offset + 2]
+                metadata.tempoChanges.append((tick, tempo))
+            elif eventType == 0x58 or eventType == 0x59:
+                event = metaDecoderByType[eventType](deltaTime, buffer, offset, end)
+                signatures = metadata.timeSignatures if eventType == 0x58 else metadata.keySignatures
+                signatures.append((tick, event))
+            offset = end
+        elif runningStatus == 0xF0 or runningStatus == 0xF7:
+            length, offset = decodeVLQ(buffer, offset)
+            offset += length
+        else:
+            raise ValueError(f"Unsupported status byte 0x{runningStatus:02X} at offset {offset}.")
+
+    metadata.trackNames.append(trackName)
+    metadata.eventsCount += eventsCount
+    metadata.notesCount += notesCount
+    if notesCount and (metadata.lowestPitch is None or lowestPitch < metadata.lowestPitch):
+        metadata.lowestPitch = lowestPitch
+    if notesCount and (metadata.highestPitch is None or highestPitch > metadata.highestPitch):
+        metadata.highestPitch = highestPitch
+    metadata.totalTicks = max(metadata.totalTicks, tick)
+
+def scanMetadataBuffer(buffer):
+    midiFormat, tracksCount, ppqn, offset = decodeHeader(buffer)
+    metadata = MidiMetadata(midiFormat, tracksCount, ppqn)
+    for offset, chunkLength in decodeTrackIndex(buffer, offset, tracksCount):
+        scanTrack(buffer, offset, metadata)
+    metadata.tempoChanges.sort(key = lambda change: change[0])
+    metadata.timeSignatures.sort(key = lambda change: change[0])
+    metadata.keySignatures.sort(key = lambda change: change[0])
+    metadata.duration = TempoMap(ppqn, metadata.tempoChanges).tickToSeconds(metadata.totalTicks)
+    return metadata
+
+def scanMetadata(filePath):
+    with open(filePath, "rb") as f:
+        memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        metadata = scanMetadataBuffer(memoryMap)
+        memoryMap.close()
+        return metadata
@@ -0,0 +1,86 @@
+from collections import deque
+from dataclasses import dataclass
+from . events import NoteOnEvent, NoteOffEvent
+
+@dataclass
+class Note:
+    __slots__ = ("start", "end", "channel", "pitch", "velocity", "track")
+    start: int
+    end: int
+    channel: int
+    pitch: int
+    velocity: int
+    track: int
+
+def extractTrackNotes(events, trackIndex = 0):
+    notes = []
+    # Overlapping notes of the same pitch and channel are paired first in, first out.
+    activeNotes = {}
+    tick = 0
+    for event in events:
+        tick += event.deltaTime
+        eventClass = type(event)
+        if eventClass is NoteOnEvent:
+            note = Note(tick, tick, event.channel, event.note, event.velocity, trackIndex)
+            activeNotes.setdefault((event.channel, event.note), deque()).append(note)
+            notes.append(note)
+        elif eventClass is NoteOffEvent:
+            pending = activeNotes.get((event.channel, event.note))
+            if pending: pending.popleft().end = tick
+    for pending in activeNotes.values():
+        for note in pending:
+            note.end = tick
+    return notes
+
+def extractNotes(midiFile):
+    notes = []
+    for trackIndex, track in enumerate(midiFile.tracks):
+        notes.extend(extractTrackNotes(track.events, trackIndex))
+    notes.sort(key = lambda note: (note.start, note.track))
+    return notes
+
+class NoteIndex:
+    # An implicit interval tree. The notes are sorted by start and the node of
+    # a range is its middle element, which stores the largest end in its
+    # subtree, so overlap queries skip subtrees that end before the range.
+    def __init__(self, notes):
+        self.notes = sorted(notes, key = lambda note: (note.start, note.track))
+        self.starts = [note.start for note in self.notes]
+        self.ends = [note.end for note in self.notes]
+        self.maxEnds = list(self.ends)
+        self.buildMaxEnds(0, len(self.notes))
+
+    @classmethod
+    def fromMidiFile(cls, midiFile):
+        return cls(extractNotes(midiFile))
+
+    def __len__(self):
+        return len(self.notes)
+
+    def buildMaxEnds(self, low, high):
+        if low >= high: return None
+        middle = (low + high) // 2
+        maxEnd = self.ends[middle]
+        for childEnd in (self.buildMaxEnds(low, middle), self.buildMaxEnds(middle + 1, high)):
+            if childEnd is not None and childEnd > maxEnd: maxEnd = childEnd
+        self.maxEnds[middle] = maxEnd
+        return maxEnd
+
+    def overlapping(self, start, end):
+        notes, starts, ends, maxEnds = self.notes, self.starts, self.ends, self.maxEnds
+        result = []
+
+        def search(low, high):
+            while low < high:
+                middle = (low + high) // 2
+                if maxEnds[middle] <= start: return
+                search(low, middle)
+                if starts[middle] >= end: return
+                if ends[middle] > start: result.append(notes[middle])
+                low = middle + 1
+
+        search(0, len(notes))
+        return result
+
+    def at(self, tick):
+        return self.overlapping(tick, tick + 1)
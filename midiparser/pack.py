@@ -0,0 +1,196 @@
+import os
+import sys
+import mmap
+import random
+import struct
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from . parser import MidiFile
+
+# A pack is a directory of shards, each a single file holding many standard
+# MIDI files back to back, so reading a file costs a slice of a memory map
+# instead of an open, a stat and a map of its own.
+#
+# Shard layout, all little endian:
+#   header: magic, version, recordsCount, indexOffset
+#   records: the bytes of every file back to back
+#   index: offset and length of every record, then the offsets of the keys
+#          into the key blob, then the UTF-8 key blob
+
+packMagic = b"MIDP"
+packVersion = 1
+shardHeaderStruct = struct.Struct("<4sIQQ")
+shardSuffix = ".midpack"
+
+class PackWriter:
+    def __init__(self, directory, shardBytes = 1 << 30, prefix = "shard"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.shardBytes = shardBytes
+        self.prefix = prefix
+        self.shardsCount = 0
+        self.keys = set()
+        self.file = None
+        # Writing to an existing pack adds shards after the ones already there,
+        # and keys must stay unique across all of them.
+        for shardPath in self.directory.glob("*" + shardSuffix):
+            shard = PackShard(shardPath)
+            self.keys.update(shard.keys)
+            shard.close()
+            number = shardPath.stem[len(prefix) + 1:]
+            if shardPath.stem.startswith(prefix + "-") and number.isdigit():
+                self.shardsCount = max(self.shardsCount, int(number) + 1)
+
+    def openShard(self):
+        shardPath = self.directory / f"{self.prefix}-{self.shardsCount:05d}{shardSuffix}"
+        self.shardsCount += 1
+        self.file = open(shardPath, "wb")
+        self.file.write(bytes(shardHeaderStruct.size))
+        self.offsets = array("Q")
+        self.lengths = array("Q")
+        self.shardKeys = []
+
+    def closeShard(self):
+        indexOffset = self.file.tell()
+        keys = [key.encode("utf-8") for key in self.shardKeys]
+        keyOffsets = array("Q", [0])
+        for key in keys:
+            keyOffsets.append(keyOffsets[-1] + len(key))
+        for column in (self.offsets, self.lengths, keyOffsets):
+            if sys.byteorder == "big": column.byteswap()
+            self.file.write(column.tobytes())
+        self.file.write(b"".join(keys))
+        self.file.seek(0)
+        self.file.write(shardHeaderStruct.pack(packMagic, packVersion, len(self.offsets), indexOffset))
+        self.file.close()
+        self.file = None
+
+    def add(self, key, data):
+        if key in self.keys:
+            raise ValueError(f"Duplicate pack key {key!r}.")
+        if isinstance(data, MidiFile): data = data.toBytes()
+        if self.file is not None and self.file.tell() + len(data) > self.shardBytes and self.offsets:
+            self.closeShard()
+        if self.file is None: self.openShard()
+        self.keys.add(key)
+        self.offsets.append(self.file.tell())
+        self.lengths.append(len(data))
+        self.shardKeys.append(key)
+        self.file.write(data)
+
+    def addFile(self, filePath, key = None):
+        with open(filePath, "rb") as f:
+            self.add(os.fspath(filePath) if key is None else key, f.read())
+
+    def close(self):
+        if self.file is not None: self.closeShard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+def readColumn(buffer, offset, count):
+    column = array("Q")
+    column.frombytes(buffer[offset : offset + 8 * count])
+    if sys.byteorder == "big": column.byteswap()
+    return column
+
+class PackShard:
+    def __init__(self, shardPath):
+        with open(shardPath, "rb") as f:
+            self.memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, recordsCount, indexOffset = shardHeaderStruct.unpack_from(self.memoryMap, 0)
+        if magic != packMagic or version != packVersion:
+            raise ValueError(f"{shardPath} is not a pack shard.")
+        self.offsets = readColumn(self.memoryMap, indexOffset, recordsCount)
+        self.lengths = readColumn(self.memoryMap, indexOffset + 8 * recordsCount, recordsCount)
+        keyOffsets = readColumn(self.memoryMap, indexOffset + 16 * recordsCount, recordsCount + 1)
+        keysStart = indexOffset + 8 * (3 * recordsCount + 1)
+        keyBlob = self.memoryMap[keysStart : keysStart + keyOffsets[-1]]
+        self.keys = [str(keyBlob[start : end], "utf-8") for start, end in zip(keyOffsets, keyOffsets[1:])]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        self.memoryMap.close()
+
+class PackReader:
+    def __init__(self, directory):
+        self.shards = [PackShard(shardPath) for shardPath in sorted(Path(directory).glob("*" + shardSuffix))]
+        self.firstIds = [0]
+        for shard in self.shards:
+            self.firstIds.append(self.firstIds[-1] + len(shard))
+        self.idByKey = {}
+        for shard, firstId in zip(self.shards, self.firstIds):
+            for i, key in enumerate(shard.keys):
+                if key in self.idByKey:
+                    self.close()
+                    raise ValueError(f"Duplicate pack key {key!r}.")
+                self.idByKey[key] = firstId + i
+
+    def __len__(self):
+        return self.firstIds[-1]
+
+    def __contains__(self, key):
+        return key in self.idByKey
+
+    def keys(self):
+        return self.idByKey.keys()
+
+    def locate(self, item):
+        fileId = self.idByKey[item] if isinstance(item, str) else item
+        if fileId < 0: fileId += len(self)
+        if not 0 <= fileId < len(self):
+            raise IndexError(f"Pack file id {item} is out of range.")
+        shardIndex = bisect_right(self.firstIds, fileId) - 1
+        shard = self.shards[shardIndex]
+        recordIndex = fileId - self.firstIds[shardIndex]
+        return shard, shard.offsets[recordIndex], shard.lengths[recordIndex]
+
+    def key(self, fileId):
+        shardIndex = bisect_right(self.firstIds, fileId) - 1
+        return self.shards[shardIndex].keys[fileId - self.firstIds[shardIndex]]
+
+    def getBytes(self, item):
+        shard, offset, length = self.locate(item)
+        return shard.memoryMap[offset : offset + length]
+
+    def get(self, item, eventTypes = None):
+        shard, offset, length = self.locate(item)
+        return MidiFile.fromBuffer(shard.memoryMap, eventTypes, offset = offset)
+
+    def __getitem__(self, item):
+        return self.get(item)
+
+    def __iter__(self):
+        for fileId in range(len(self)):
+            yield self.get(fileId)
+
+    def iterShuffled(self, seed = None, worker = 0, workers = 1, eventTypes = None):
+        # Every worker of a data loader gets a disjoint slice of one
+        # permutation, so passing the same seed to all of them covers the pack
+        # exactly once per epoch.
+        fileIds = list(range(len(self)))
+        random.Random(seed).shuffle(fileIds)
+        for fileId in fileIds[worker::workers]:
+            yield self.key(fileId), self.get(fileId, eventTypes)
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+def packFiles(paths, directory, shardBytes = 1 << 30, key = os.fspath):
+    with PackWriter(directory, shardBytes) as writer:
+        for path in paths:
+            writer.addFile(path, key(path))
+    return writer.shardsCount
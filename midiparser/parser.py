@@ -1,9 +1,18 @@
 import mmap
 import struct
 from . events import *
+from . decoder import *
+from . stats import ParseStats
+from time import perf_counter_ns
 from typing import List
 from os import SEEK_CUR
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, fields
+from heapq import merge
+from itertools import repeat, compress
+from operator import itemgetter, attrgetter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 
 # A brief description of the MIDI specification:
 # - http://www.somascape.org/midi/tech/spec.html
@@ -45,6 +54,20 @@ channelEventByStatus = {
     0xE0 : PitchBendEvent,
 }
 
+metaTypeByEvent = {eventClass : eventType for eventType, eventClass in metaEventByType.items()}
+
+statusByChannelEvent = {eventClass : status for status, eventClass in channelEventByStatus.items()}
+
+channelDataFieldsByEvent = {
+    eventClass : tuple(field.name for field in fields(eventClass)[2:])
+    for eventClass in channelEventByStatus.values()
+}
+
+channelDataSizeByStatus = {
+    status : len(channelDataFieldsByEvent[eventClass])
+    for status, eventClass in channelEventByStatus.items()
+}
+
 def unpackVLQ(memoryMap):
     total = 0
     while True:
@@ -94,14 +117,151 @@ def parseEvent(memoryMap, parseState):
 class MidiParseState:
     runningStatus: int = 0
 
-def parseEvents(memoryMap):
-    events = []
+# An event filter lets the decoders skip unwanted events by their length
+# without creating them. The delta times of skipped events are added to the
+# next kept event, so kept events keep their absolute times.
+
+class EventFilter:
+    def __init__(self, eventTypes):
+        self.eventTypes = frozenset(eventTypes)
+        self.channelStatuses = frozenset(
+            status for status, eventClass in channelEventByStatus.items() if eventClass in self.eventTypes)
+        # Note-ons with zero velocity decode as note-offs.
+        if NoteOffEvent in self.eventTypes: self.channelStatuses |= {0x90}
+        self.metaTypes = frozenset(
+            eventType for eventType, eventClass in metaEventByType.items() if eventClass in self.eventTypes)
+        self.sysExStatuses = frozenset(status for status, eventClass in
+            ((0xF0, SysExEvent), (0xF7, EscapeSequenceEvent)) if eventClass in self.eventTypes)
+
+def parseFilteredEvent(memoryMap, parseState, eventFilter):
+    deltaTime = unpackVLQ(memoryMap)
+    status = struct.unpack("B", memoryMap.read(1))[0]
+
+    if status & 0x80: parseState.runningStatus = status
+    else: memoryMap.seek(-1, SEEK_CUR)
+
+    runningStatus = parseState.runningStatus
+    if runningStatus == 0xFF:
+        eventType = struct.unpack("B", memoryMap.read(1))[0]
+        length = unpackVLQ(memoryMap)
+        if eventType in eventFilter.metaTypes or eventType == 0x2F:
+            return deltaTime, metaEventByType[eventType].fromMemoryMap(deltaTime, length, memoryMap)
+        memoryMap.read(length)
+    elif runningStatus == 0xF0 or runningStatus == 0xF7:
+        if runningStatus in eventFilter.sysExStatuses:
+            return deltaTime, parseSysExEvent(deltaTime, runningStatus, memoryMap)
+        memoryMap.read(unpackVLQ(memoryMap))
+    elif runningStatus >= 0x80:
+        if runningStatus & 0xF0 in eventFilter.channelStatuses:
+            return deltaTime, parseChannelEvent(deltaTime, runningStatus, memoryMap)
+        memoryMap.read(channelDataSizeByStatus[runningStatus & 0xF0])
+    return deltaTime, None
+
+def decodeFilteredEvent(buffer, offset, parseState, eventFilter):
+    deltaTime, offset = decodeVLQ(buffer, offset)
+    status = buffer[offset]
+    if status & 0x80:
+        parseState.runningStatus = status
+        offset += 1
+    else:
+        status = parseState.runningStatus
+
+    if 0x80 <= status < 0xF0:
+        kind = status & 0xF0
+        if kind not in eventFilter.channelStatuses:
+            return deltaTime, None, offset + channelDataSizeByStatus[kind]
+        channel = status & 0xF
+        if kind == 0x90:
+            note = buffer[offset]
+            velocity = buffer[offset + 1]
+            if velocity: return deltaTime, NoteOnEvent(deltaTime, channel, note, velocity), offset + 2
+            return deltaTime, NoteOffEvent(deltaTime, channel, note, 0), offset + 2
+        if channelDataSizeByStatus[kind] == 2:
+            event = channelEventByStatus[kind](deltaTime, channel, buffer[offset], buffer[offset + 1])
+            return deltaTime, event, offset + 2
+        return deltaTime, channelEventByStatus[kind](deltaTime, channel, buffer[offset]), offset + 1
+    elif status == 0xFF:
+        eventType = buffer[offset]
+        length, start = decodeVLQ(buffer, offset + 1)
+        end = start + length
+        if eventType not in eventFilter.metaTypes and eventType != 0x2F:
+            return deltaTime, None, end
+        if end > len(buffer):
+            raise EOFError(f"Meta event at offset {offset} exceeds the buffer.")
+        return deltaTime, metaDecoderByType[eventType](deltaTime, buffer, start, end), end
+    elif status == 0xF0 or status == 0xF7:
+        length, start = decodeVLQ(buffer, offset)
+        end = start + length
+        if status not in eventFilter.sysExStatuses:
+            return deltaTime, None, end
+        eventClass = SysExEvent if status == 0xF0 else EscapeSequenceEvent
+        return deltaTime, eventClass(deltaTime, buffer[start:end]), end
+    raise ValueError(f"Unsupported status byte 0x{status:02X} at offset {offset}.")
+
+def iterTrackEvents(memoryMap, eventFilter = None):
     parseState = MidiParseState()
+    if eventFilter is None:
+        while True:
+            event = parseEvent(memoryMap, parseState)
+            yield event
+            if isinstance(event, EndOfTrackEvent): break
+        return
+
+    pendingDeltaTime = 0
     while True:
-        event = parseEvent(memoryMap, parseState)
-        events.append(event)
-        if isinstance(event, EndOfTrackEvent): break
-    return events
+        deltaTime, event = parseFilteredEvent(memoryMap, parseState, eventFilter)
+        if type(event) in eventFilter.eventTypes:
+            event.deltaTime += pendingDeltaTime
+            pendingDeltaTime = 0
+            yield event
+        else:
+            pendingDeltaTime += deltaTime
+        if type(event) is EndOfTrackEvent: break
+
+def decodeFilteredEvents(buffer, offset, parseState, eventFilter):
+    events = []
+    pendingDeltaTime = 0
+    while True:
+        deltaTime, event, offset = decodeFilteredEvent(buffer, offset, parseState, eventFilter)
+        if type(event) in eventFilter.eventTypes:
+            event.deltaTime += pendingDeltaTime
+            pendingDeltaTime = 0
+            events.append(event)
+        else:
+            pendingDeltaTime += deltaTime
+        if type(event) is EndOfTrackEvent: return events, offset
+
+def decodeInstrumentedEvents(buffer, offset, parseState, eventFilter, stats, trackIndex):
+    events = []
+    pendingDeltaTime = 0
+    while True:
+        start = offset
+        began = perf_counter_ns()
+        if eventFilter is None:
+            event, offset = decodeEvent(buffer, offset, parseState)
+            deltaTime = event.deltaTime
+        else:
+            deltaTime, event, offset = decodeFilteredEvent(buffer, offset, parseState, eventFilter)
+        elapsed = perf_counter_ns() - began
+        runningStatus = buffer[decodeVLQ(buffer, start)[1]] < 0x80
+        stats.record(trackIndex, type(event) if event is not None else None, offset - start, elapsed, runningStatus)
+
+        if eventFilter is None or type(event) in eventFilter.eventTypes:
+            event.deltaTime += pendingDeltaTime
+            pendingDeltaTime = 0
+            events.append(event)
+        else:
+            pendingDeltaTime += deltaTime
+        if type(event) is EndOfTrackEvent: return events, offset
+
+def parseEvents(memoryMap):
+    return list(iterTrackEvents(memoryMap))
+
+def iterAbsoluteEvents(events, trackIndex):
+    tick = 0
+    for event in events:
+        tick += event.deltaTime
+        yield tick, trackIndex, event
 
 def parseTrackHeader(memoryMap):
     identifier = memoryMap.read(4).decode('ascii')
@@ -118,6 +278,21 @@ class MidiTrack:
         events = parseEvents(memoryMap)
         return cls(events)
 
+    @classmethod
+    def fromBuffer(cls, buffer, offset, eventFilter = None, stats = None, trackIndex = 0):
+        if stats is not None:
+            events, offset = decodeInstrumentedEvents(
+                buffer, offset, MidiParseState(), eventFilter, stats, trackIndex)
+        elif eventFilter is None:
+            events, offset = decodeEvents(buffer, offset, MidiParseState())
+        else:
+            events, offset = decodeFilteredEvents(buffer, offset, MidiParseState(), eventFilter)
+        return cls(events)
+
+    def toArrays(self):
+        from . columnar import TrackArrays
+        return TrackArrays.fromEvents(self.events)
+
 def parseHeader(memoryMap):
     identifier = memoryMap.read(4).decode('ascii')
     chunkLength = struct.unpack(">I", memoryMap.read(4))[0]
@@ -129,6 +304,113 @@ def parseHeader(memoryMap):
 def parseTracks(memoryMap, tracksCount):
     return [MidiTrack.fromMemoryMap(memoryMap) for i in range(tracksCount)]
 
+def decodeTracks(buffer, trackIndex, eventFilter = None, stats = None):
+    return [MidiTrack.fromBuffer(buffer, offset, eventFilter, stats, i)
+        for i, (offset, chunkLength) in enumerate(trackIndex)]
+
+# Worker processes send tracks back in a compact form, since pickling and
+# unpickling lists of event objects costs more than decoding them. Channel
+# events are split by class into columns of their fields, and a kind byte per
+# event records its class, so the parent rebuilds the events in C level loops
+# while the workers decode the next tracks. The few meta and SysEx events are
+# sent as they are, with kind 0.
+compactEventClasses = list(channelEventByStatus.values())
+compactKindByClass = {eventClass : kind for kind, eventClass in enumerate(compactEventClasses, 1)}
+compactKindSelectors = [bytes(int(byte == kind) for byte in range(256)) for kind in range(len(compactEventClasses) + 1)]
+compactFieldGetters = [[attrgetter(name) for name in eventClass.__slots__] for eventClass in compactEventClasses]
+
+@dataclass(eq = False)
+class CompactTrack:
+    kinds: bytes
+    otherEvents: List
+    columns: List[List[array]]
+
+    @classmethod
+    def fromTrack(cls, track):
+        events = track.events
+        kinds = bytes(map(compactKindByClass.get, map(type, events), repeat(0)))
+        def select(kind):
+            return list(compress(events, kinds.translate(compactKindSelectors[kind])))
+        columns = []
+        for kind, getters in enumerate(compactFieldGetters, 1):
+            selected = select(kind)
+            columns.append([array("I" if i == 0 else "B", map(getter, selected)) for i, getter in enumerate(getters)])
+        return cls(kinds, select(0), columns)
+
+    def toTrack(self):
+        sources = [iter(self.otherEvents)]
+        sources.extend(map(eventClass, *columns) for eventClass, columns in zip(compactEventClasses, self.columns))
+        return MidiTrack(list(map(next, map(sources.__getitem__, self.kinds))))
+
+@dataclass(eq = False)
+class CompactMidiFile:
+    midiFormat: int
+    ppqn: int
+    tracks: List[CompactTrack]
+
+    @classmethod
+    def fromFile(cls, filePath, eventTypes = None):
+        midiFile = MidiFile.fromFile(filePath, eventTypes = eventTypes)
+        return cls(midiFile.midiFormat, midiFile.ppqn, [CompactTrack.fromTrack(track) for track in midiFile.tracks])
+
+    def toMidiFile(self):
+        return MidiFile(self.midiFormat, self.ppqn, [track.toTrack() for track in self.tracks])
+
+def parseTrackChunk(data, eventFilter = None, collectStats = False):
+    if not collectStats:
+        return CompactTrack.fromTrack(MidiTrack.fromBuffer(data, 0, eventFilter))
+    stats = ParseStats()
+    return CompactTrack.fromTrack(MidiTrack.fromBuffer(data, 0, eventFilter, stats)), stats
+
+def parseTracksParallel(buffer, trackIndex, workers, eventFilter = None, stats = None, executor = None):
+    # A caller owned executor is reused as is, which saves starting a pool of
+    # processes on every call.
+    chunks = [buffer[offset : offset + chunkLength] for offset, chunkLength in trackIndex]
+    ownsExecutor = executor is None
+    if ownsExecutor: executor = ProcessPoolExecutor(max_workers = workers)
+    try:
+        tracks = []
+        results = executor.map(parseTrackChunk, chunks, repeat(eventFilter), repeat(stats is not None))
+        for i, result in enumerate(results):
+            if stats is not None:
+                result, trackStats = result
+                stats.merge(trackStats, i)
+            tracks.append(result.toTrack())
+        return tracks
+    finally:
+        if ownsExecutor: executor.shutdown()
+
+class LazyTrackList(Sequence):
+    def __init__(self, memoryMap, trackIndex, eventFilter = None, stats = None):
+        self.memoryMap = memoryMap
+        self.trackIndex = trackIndex
+        self.eventFilter = eventFilter
+        self.stats = stats
+        self.cache = [None] * len(trackIndex)
+
+    def __len__(self):
+        return len(self.trackIndex)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        track = self.cache[index]
+        if track is None:
+            offset, chunkLength = self.trackIndex[index]
+            trackIndex = range(len(self))[index]
+            # Every on demand decode is timed and traced on its own.
+            if self.stats is not None: self.stats.begin()
+            track = MidiTrack.fromBuffer(self.memoryMap, offset, self.eventFilter, self.stats, trackIndex)
+            if self.stats is not None: self.stats.end()
+            self.cache[index] = track
+        return track
+
+    def isLoaded(self, index):
+        return self.cache[index] is not None
+
+    def close(self):
+        self.memoryMap.close()
+
 @dataclass
 class MidiFile:
     midiFormat: int
@@ -136,11 +418,67 @@ class MidiFile:
     tracks: List[MidiTrack]
 
     @classmethod
-    def fromFile(cls, filePath):
+    def fromFile(cls, filePath, lazy = False, workers = None, eventTypes = None, stats = None, executor = None):
+        eventFilter = None if eventTypes is None else EventFilter(eventTypes)
         with open(filePath, "rb") as f:
             memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
-            midiFormat, tracksCount, ppqn = parseHeader(memoryMap)
-            tracks = parseTracks(memoryMap, tracksCount)
+            midiFormat, tracksCount, ppqn, offset = decodeHeader(memoryMap)
+            trackIndex = decodeTrackIndex(memoryMap, offset, tracksCount)
+            if lazy:
+                return cls(midiFormat, ppqn, LazyTrackList(memoryMap, trackIndex, eventFilter, stats))
+            if stats is not None: stats.begin()
+            if workers is None and executor is None:
+                tracks = decodeTracks(memoryMap, trackIndex, eventFilter, stats)
+            else:
+                tracks = parseTracksParallel(memoryMap, trackIndex, workers, eventFilter, stats, executor)
+            if stats is not None: stats.end()
             memoryMap.close()
             return cls(midiFormat, ppqn, tracks)
 
+    @classmethod
+    def fromBuffer(cls, buffer, eventTypes = None, stats = None, offset = 0):
+        eventFilter = None if eventTypes is None else EventFilter(eventTypes)
+        midiFormat, tracksCount, ppqn, offset = decodeHeader(buffer, offset)
+        trackIndex = decodeTrackIndex(buffer, offset, tracksCount)
+        if stats is not None: stats.begin()
+        tracks = decodeTracks(buffer, trackIndex, eventFilter, stats)
+        if stats is not None: stats.end()
+        return cls(midiFormat, ppqn, tracks)
+
+    def toArrays(self):
+        from . columnar import MidiFileArrays
+        return MidiFileArrays.fromMidiFile(self)
+
+    def toInterned(self, pool = None):
+        from . intern import InternedMidiFile
+        return InternedMidiFile.fromMidiFile(self, pool)
+
+    def toBytes(self, compressNoteOffs = True):
+        from . writer import encodeMidiFile
+        return bytes(encodeMidiFile(self, compressNoteOffs))
+
+    def toFile(self, filePath, compressNoteOffs = True):
+        from . writer import encodeMidiFile
+        with open(filePath, "wb") as f:
+            f.write(encodeMidiFile(self, compressNoteOffs))
+
+    def iterMerged(self):
+        # heapq.merge breaks ties by input order, so events at the same tick
+        # come in track order and keep their order within a track.
+        tracks = [iterAbsoluteEvents(track.events, i) for i, track in enumerate(self.tracks)]
+        return merge(*tracks, key = itemgetter(0))
+
+    def tempoMap(self):
+        from . tempo import TempoMap
+        return TempoMap.fromMidiFile(self)
+
+    def close(self):
+        if isinstance(self.tracks, LazyTrackList):
+            self.tracks.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
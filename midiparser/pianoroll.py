@@ -0,0 +1,103 @@
+import numpy
+from typing import Tuple
+from dataclasses import dataclass
+from . parser import MidiFile
+
+# Piano rolls are rasterized from note columns without a loop over notes.
+# Every note covers the steps from the one its start falls in up to the one
+# its end falls in, and at least one step. Where notes overlap, the cell keeps
+# the largest velocity. Rolls are laid out as (pitch, step), or as
+# (layer, pitch, step) when notes are stacked by channel or track.
+
+@dataclass(eq = False)
+class SparsePianoRoll:
+    coordinates: numpy.ndarray
+    values: numpy.ndarray
+    shape: Tuple[int, ...]
+
+    def __len__(self):
+        return len(self.values)
+
+    def toDense(self, dtype = numpy.uint8):
+        roll = numpy.zeros(self.shape, dtype = dtype)
+        roll[tuple(self.coordinates)] = self.values
+        return roll
+
+def noteSteps(midiFileArrays, notes, step, unit):
+    if unit == "ticks":
+        start, end = notes.start / step, notes.end / step
+    elif unit == "seconds":
+        tempoMap = midiFileArrays.tempoMap()
+        start, end = tempoMap.ticksToSeconds(notes.start) / step, tempoMap.ticksToSeconds(notes.end) / step
+    else:
+        raise ValueError(f"Unsupported piano roll unit {unit!r}.")
+    startStep = numpy.floor(start).astype(numpy.int64)
+    endStep = numpy.maximum(numpy.floor(end).astype(numpy.int64), startStep + 1)
+    return startStep, endStep
+
+def sparsePianoRoll(midiFile, step, unit = "ticks", stack = None, binary = False,
+                    pitchRange = (0, 128), length = None):
+    midiFileArrays = midiFile.toArrays() if isinstance(midiFile, MidiFile) else midiFile
+    notes = midiFileArrays.notes()
+    low, high = pitchRange
+    keep = (notes.pitch >= low) & (notes.pitch < high)
+    startStep, endStep = noteSteps(midiFileArrays, notes, step, unit)
+    startStep, endStep = startStep[keep], endStep[keep]
+
+    if stack is None:
+        layer = None
+    elif stack == "channel":
+        layer, layersCount = notes.channel[keep].astype(numpy.int64), 16
+    elif stack == "track":
+        layer, layersCount = notes.track[keep].astype(numpy.int64), len(midiFileArrays.tracks)
+    else:
+        raise ValueError(f"Unsupported piano roll stacking {stack!r}.")
+    if length is None:
+        length = int(endStep.max()) if len(endStep) else 0
+    endStep = numpy.minimum(endStep, length)
+    startStep = numpy.minimum(startStep, endStep)
+
+    # Expand every note into its steps with one repeat and one arange.
+    lengths = endStep - startStep
+    noteIndex = numpy.repeat(numpy.arange(len(lengths)), lengths)
+    firstCell = numpy.cumsum(lengths) - lengths
+    steps = startStep[noteIndex] + numpy.arange(len(noteIndex)) - firstCell[noteIndex]
+    pitch = notes.pitch[keep].astype(numpy.int64)[noteIndex] - low
+    values = numpy.ones(len(noteIndex), dtype = numpy.uint8) if binary else notes.velocity[keep][noteIndex]
+
+    shape = (high - low, length)
+    cell = pitch * length + steps
+    coordinates = [pitch, steps]
+    if layer is not None:
+        shape = (layersCount,) + shape
+        cell += layer[noteIndex] * (high - low) * length
+        coordinates.insert(0, layer[noteIndex])
+
+    # Keep the largest value of every cell, in row major order.
+    order = numpy.lexsort((values, cell))
+    last = numpy.ones(len(order), dtype = bool)
+    last[:-1] = cell[order][1:] != cell[order][:-1]
+    order = order[last]
+    return SparsePianoRoll(numpy.stack([axis[order] for axis in coordinates]), values[order], shape)
+
+def pianoRoll(midiFile, step, unit = "ticks", stack = None, binary = False,
+              pitchRange = (0, 128), length = None, dtype = numpy.uint8):
+    return sparsePianoRoll(midiFile, step, unit, stack, binary, pitchRange, length).toDense(dtype)
+
+def batchPianoRolls(rolls, length = None, dtype = None):
+    # Rolls are padded or truncated along the step axis, the last one, and the
+    # steps each roll really has are returned alongside the batch.
+    lengths = numpy.array([roll.shape[-1] for roll in rolls], dtype = numpy.int64)
+    if length is None:
+        length = int(lengths.max()) if len(lengths) else 0
+    if not rolls:
+        return numpy.zeros((0, length), dtype = dtype or numpy.uint8), lengths
+    dtype = rolls[0].dtype if dtype is None else dtype
+    layout = rolls[0].shape[:-1]
+    batch = numpy.zeros((len(rolls),) + layout + (length,), dtype = dtype)
+    for i, roll in enumerate(rolls):
+        if roll.shape[:-1] != layout:
+            raise ValueError(f"Piano roll {i} has shape {roll.shape}, expected {layout} before the steps.")
+        steps = min(roll.shape[-1], length)
+        batch[i, ..., :steps] = roll[..., :steps]
+    return batch, numpy.minimum(lengths, length)
@@ -0,0 +1,173 @@
+import time
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+# Deadlines are derived from one anchor, the clock reading at which playback
+# was at a known file position, instead of from accumulated sleeps, so late
+# wakeups never push later events back. The scheduler sleeps until shortly
+# before a deadline and spins for the rest, and every event due within the
+# lookahead window is dispatched in the same batch.
+
+@dataclass
+class JitterStats:
+    latenesses: array = field(default_factory = lambda: array("d"))
+
+    def record(self, lateness):
+        self.latenesses.append(lateness)
+
+    @property
+    def count(self):
+        return len(self.latenesses)
+
+    @property
+    def mean(self):
+        return sum(self.latenesses) / len(self.latenesses) if self.latenesses else 0.0
+
+    @property
+    def maximum(self):
+        return max(self.latenesses, default = 0.0)
+
+    @property
+    def standardDeviation(self):
+        if not self.latenesses: return 0.0
+        mean = self.mean
+        return (sum((lateness - mean) ** 2 for lateness in self.latenesses) / len(self.latenesses)) ** 0.5
+
+    def percentile(self, percent):
+        if not self.latenesses: return 0.0
+        latenesses = sorted(self.latenesses)
+        return latenesses[min(int(len(latenesses) * percent / 100), len(latenesses) - 1)]
+
+    def asDict(self):
+        return {
+            "count" : self.count,
+            "mean" : self.mean,
+            "standardDeviation" : self.standardDeviation,
+            "p99" : self.percentile(99),
+            "maximum" : self.maximum,
+        }
+
+class PlaybackScheduler:
+    def __init__(self, midiFile, callback, lookahead = 0.001, spin = 0.0005,
+                 tempoScale = 1.0, clock = time.perf_counter, sleep = None):
+        tempoMap = midiFile.tempoMap()
+        self.times = []
+        self.events = []
+        for tick, trackIndex, event in midiFile.iterMerged():
+            self.times.append(tempoMap.tickToSeconds(tick))
+            self.events.append((trackIndex, event))
+        self.callback = callback
+        self.lookahead = lookahead
+        self.spin = spin
+        self.tempoScale = tempoScale
+        self.clock = clock
+        self.wakeup = threading.Event()
+        self.sleep = self.wakeup.wait if sleep is None else sleep
+        self.lock = threading.Lock()
+        self.jitter = JitterStats()
+        self.index = 0
+        self.anchorClock = None
+        self.anchorPosition = 0.0
+        self.running = False
+        self.thread = None
+
+    @property
+    def duration(self):
+        return self.times[-1] if self.times else 0.0
+
+    @property
+    def done(self):
+        return self.index >= len(self.times)
+
+    @property
+    def position(self):
+        with self.lock:
+            return self.positionAt(self.clock())
+
+    def positionAt(self, now):
+        if self.anchorClock is None: return self.anchorPosition
+        return self.anchorPosition + (now - self.anchorClock) * self.tempoScale
+
+    def deadline(self, index):
+        return self.anchorClock + (self.times[index] - self.anchorPosition) / self.tempoScale
+
+    def reanchor(self, position):
+        self.anchorPosition = position
+        if self.anchorClock is not None: self.anchorClock = self.clock()
+
+    def seek(self, seconds):
+        with self.lock:
+            self.reanchor(seconds)
+            self.index = bisect_left(self.times, seconds)
+        self.wakeup.set()
+
+    def setTempoScale(self, tempoScale):
+        if tempoScale <= 0:
+            raise ValueError("The tempo scale must be positive.")
+        with self.lock:
+            self.reanchor(self.positionAt(self.clock()))
+            self.tempoScale = tempoScale
+        self.wakeup.set()
+
+    def run(self):
+        self.running = True
+        self.play()
+
+    def play(self):
+        with self.lock:
+            self.anchorClock = self.clock()
+        while self.running:
+            with self.lock:
+                if self.done: break
+                # Clear under the lock, so a seek or tempo change that lands
+                # after this point always interrupts the sleep below.
+                self.wakeup.clear()
+                index = self.index
+                deadline = self.deadline(index)
+            remaining = deadline - self.clock()
+            if remaining > self.spin:
+                self.sleep(remaining - self.spin)
+                # Seeks and tempo changes move the deadline, so recompute it.
+                continue
+            while self.clock() < deadline: pass
+
+            with self.lock:
+                if self.index != index: continue
+                now = self.clock()
+                position = self.positionAt(now)
+                end = bisect_left(self.times, position + self.lookahead * self.tempoScale, index)
+                end = max(end, index + 1)
+                batch = [(self.deadline(i),) + self.events[i] for i in range(index, end)]
+                self.index = end
+            self.jitter.record(now - deadline)
+            self.callback(batch)
+        self.running = False
+        with self.lock:
+            self.anchorPosition = self.positionAt(self.clock())
+            self.anchorClock = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            raise RuntimeError("Playback is already running.")
+        self.running = True
+        self.thread = threading.Thread(target = self.play, name = "PlaybackScheduler", daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def join(self, timeout = None):
+        if self.thread is not None: self.thread.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
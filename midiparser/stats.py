@@ -0,0 +1,90 @@
+import tracemalloc
+from time import perf_counter
+from typing import Dict, List
+from dataclasses import dataclass, field, asdict
+
+# Parse statistics are opt-in. The decoders only take the instrumented path
+# when a ParseStats object is passed, and record() is the single hook they
+# call, so subclasses can override it to forward events to a metrics system.
+
+@dataclass
+class EventTypeStats:
+    count: int = 0
+    bytes: int = 0
+    nanoseconds: int = 0
+
+@dataclass
+class TrackStats:
+    events: int = 0
+    bytes: int = 0
+    nanoseconds: int = 0
+    runningStatusHits: int = 0
+
+@dataclass
+class ParseStats:
+    traceMemory: bool = False
+    eventTypes: Dict[str, EventTypeStats] = field(default_factory = dict)
+    tracks: List[TrackStats] = field(default_factory = list)
+    seconds: float = 0.0
+    peakMemory: int = 0
+
+    def __post_init__(self):
+        self.startTime = None
+        self.startedTracing = False
+
+    @property
+    def events(self):
+        return sum(track.events for track in self.tracks)
+
+    @property
+    def runningStatusHitRate(self):
+        events = self.events
+        return sum(track.runningStatusHits for track in self.tracks) / events if events else 0.0
+
+    def begin(self):
+        self.startTime = perf_counter()
+        if self.traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.startedTracing = True
+        if self.traceMemory: tracemalloc.reset_peak()
+
+    def end(self):
+        self.seconds += perf_counter() - self.startTime
+        if self.traceMemory:
+            self.peakMemory = max(self.peakMemory, tracemalloc.get_traced_memory()[1])
+        if self.startedTracing:
+            tracemalloc.stop()
+            self.startedTracing = False
+
+    def record(self, trackIndex, eventClass, size, nanoseconds, runningStatus):
+        while len(self.tracks) <= trackIndex:
+            self.tracks.append(TrackStats())
+        track = self.tracks[trackIndex]
+        track.events += 1
+        track.bytes += size
+        track.nanoseconds += nanoseconds
+        track.runningStatusHits += runningStatus
+
+        name = eventClass.__name__ if eventClass is not None else "Skipped"
+        eventType = self.eventTypes.get(name)
+        if eventType is None:
+            eventType = self.eventTypes[name] = EventTypeStats()
+        eventType.count += 1
+        eventType.bytes += size
+        eventType.nanoseconds += nanoseconds
+
+    def merge(self, other, trackIndex):
+        while len(self.tracks) <= trackIndex:
+            self.tracks.append(TrackStats())
+        self.tracks[trackIndex] = other.tracks[0] if other.tracks else TrackStats()
+        for name, otherType in other.eventTypes.items():
+            eventType = self.eventTypes.setdefault(name, EventTypeStats())
+            eventType.count += otherType.count
+            eventType.bytes += otherType.bytes
+            eventType.nanoseconds += otherType.nanoseconds
+
+    def asDict(self):
+        result = asdict(self)
+        result["events"] = self.events
+        result["runningStatusHitRate"] = self.runningStatusHitRate
+        return result
@@ -0,0 +1,65 @@
+from io import BytesIO, UnsupportedOperation
+from os import SEEK_CUR, PathLike
+from . parser import *
+
+# The parser unreads a single byte when it meets running status. This reader
+# supports exactly that on top of any readable stream, so pipes, sockets and
+# other non-seekable inputs can be parsed without buffering whole tracks.
+
+class PushbackReader:
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.lastByte = b""
+        self.pushedBack = False
+
+    def read(self, size):
+        if self.pushedBack and size:
+            self.pushedBack = False
+            data = self.lastByte
+        else:
+            data = b""
+        # Pipes and sockets return short reads, only an empty read is the end.
+        while len(data) < size:
+            chunk = self.stream.read(size - len(data))
+            if not chunk:
+                raise EOFError("unexpected end of MIDI stream")
+            data += chunk
+        self.position += len(data)
+        if data: self.lastByte = data[-1:]
+        return data
+
+    def seek(self, offset, whence):
+        if offset != -1 or whence != SEEK_CUR or self.pushedBack or not self.lastByte:
+            raise UnsupportedOperation("only the last read byte can be unread")
+        self.pushedBack = True
+        self.position -= 1
+
+    def tell(self):
+        return self.position
+
+    def skip(self, size):
+        while size > 0:
+            size -= len(self.read(min(size, 65536)))
+
+def iterStreamEvents(stream, eventFilter = None):
+    reader = PushbackReader(stream)
+    identifier, chunkLength, midiFormat, tracksCount, ppqn = headerStruct.unpack(reader.read(headerStruct.size))
+    # Header chunks may be longer than the six bytes defined so far.
+    reader.skip(chunkLength - 6)
+    for trackIndex in range(tracksCount):
+        chunkLength = parseTrackHeader(reader)
+        chunkEnd = reader.position + chunkLength
+        for event in iterTrackEvents(reader, eventFilter):
+            yield trackIndex, event
+        reader.skip(chunkEnd - reader.position)
+
+def iterEvents(source, eventTypes = None):
+    eventFilter = None if eventTypes is None else EventFilter(eventTypes)
+    if isinstance(source, (str, PathLike)):
+        with open(source, "rb") as f:
+            yield from iterStreamEvents(f, eventFilter)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield from iterStreamEvents(BytesIO(source), eventFilter)
+    else:
+        yield from iterStreamEvents(source, eventFilter)
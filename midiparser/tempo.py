@@ -0,0 +1,86 @@
+from heapq import merge
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from . events import TempoEvent
+
+defaultTempo = 500000
+
+def smpteTicksPerSecond(division):
+    # The upper byte of an SMPTE division is the negative frame rate.
+    fps = 256 - (division >> 8)
+    return (29.97 if fps == 29 else fps) * (division & 0xFF)
+
+class TempoMap:
+    def __init__(self, ppqn, tempoChanges, tracks = ()):
+        self.ppqn = ppqn
+        self.tracks = tracks
+        self.trackSeconds = [None] * len(tracks)
+        self.ticks = [0]
+        self.tempos = [defaultTempo]
+        if ppqn & 0x8000:
+            # SMPTE divisions count ticks in absolute time, so tempo changes do not apply.
+            self.secondsPerTick = [1 / smpteTicksPerSecond(ppqn)]
+            self.seconds = [0.0]
+            return
+        for tick, tempo in sorted(tempoChanges, key = lambda change: change[0]):
+            if tick == self.ticks[-1]:
+                self.tempos[-1] = tempo
+            else:
+                self.ticks.append(tick)
+                self.tempos.append(tempo)
+        self.secondsPerTick = [tempo / (1e6 * ppqn) for tempo in self.tempos]
+        self.seconds = [0.0]
+        for i in range(1, len(self.ticks)):
+            self.seconds.append(self.seconds[-1] + (self.ticks[i] - self.ticks[i - 1]) * self.secondsPerTick[i - 1])
+
+    @classmethod
+    def fromMidiFile(cls, midiFile):
+        tempoChanges = []
+        for track in midiFile.tracks:
+            tick = 0
+            for event in track.events:
+                tick += event.deltaTime
+                if type(event) is TempoEvent: tempoChanges.append((tick, event.tempo))
+        return cls(midiFile.ppqn, tempoChanges, midiFile.tracks)
+
+    def tempoAt(self, tick):
+        return self.tempos[bisect_right(self.ticks, tick) - 1]
+
+    def tickToSeconds(self, tick):
+        i = bisect_right(self.ticks, tick) - 1
+        return self.seconds[i] + (tick - self.ticks[i]) * self.secondsPerTick[i]
+
+    def secondsToTick(self, seconds):
+        i = max(bisect_right(self.seconds, seconds) - 1, 0)
+        return self.ticks[i] + (seconds - self.seconds[i]) / self.secondsPerTick[i]
+
+    def ticksToSeconds(self, ticks):
+        import numpy
+        ticks = numpy.asarray(ticks)
+        i = numpy.searchsorted(self.ticks, ticks, side = "right") - 1
+        segmentTicks = numpy.asarray(self.ticks)[i]
+        return numpy.asarray(self.seconds)[i] + (ticks - segmentTicks) * numpy.asarray(self.secondsPerTick)[i]
+
+    def secondsToTicks(self, seconds):
+        import numpy
+        seconds = numpy.asarray(seconds, dtype = numpy.float64)
+        i = numpy.maximum(numpy.searchsorted(self.seconds, seconds, side = "right") - 1, 0)
+        segmentSeconds = numpy.asarray(self.seconds)[i]
+        return numpy.asarray(self.ticks)[i] + (seconds - segmentSeconds) / numpy.asarray(self.secondsPerTick)[i]
+
+    def eventSeconds(self, trackIndex):
+        seconds = self.trackSeconds[trackIndex]
+        if seconds is None:
+            ticks = accumulate(event.deltaTime for event in self.tracks[trackIndex].events)
+            seconds = [self.tickToSeconds(tick) for tick in ticks]
+            self.trackSeconds[trackIndex] = seconds
+        return seconds
+
+    def eventsBetween(self, start, end):
+        ranges = []
+        for trackIndex, track in enumerate(self.tracks):
+            seconds = self.eventSeconds(trackIndex)
+            first, last = bisect_left(seconds, start), bisect_left(seconds, end)
+            events = track.events
+            ranges.append([(seconds[i], trackIndex, events[i]) for i in range(first, last)])
+        return list(merge(*ranges, key = lambda item: item[:2]))
@@ -0,0 +1,229 @@
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from os import PathLike
+from . parser import *
+from . stream import iterEvents
+
+# A pipeline is an immutable chain of stages that only runs when it is
+# applied. In the streaming form every event passes through all stages in
+# one loop, on absolute ticks, and the delta times are only recomputed for
+# the events that come out, so no intermediate track is ever built. In the
+# vectorized form every stage updates the columns of a track in place and
+# marks the rows it drops, and the track is compacted once at the end.
+
+noteEvents = (NoteOnEvent, NoteOffEvent, NotePressureEvent)
+noteStatuses = (0x80, 0x90, 0xA0)
+
+def eventCopier(eventClass):
+    # Much faster than copy.copy for the slotted event classes.
+    getter = attrgetter(*eventClass.__slots__)
+    if len(eventClass.__slots__) == 1: return lambda event: eventClass(getter(event))
+    return lambda event: eventClass(*getter(event))
+
+copierByEvent = {}
+
+def copyEvent(event):
+    copier = copierByEvent.get(type(event))
+    if copier is None:
+        copier = copierByEvent[type(event)] = eventCopier(type(event))
+    return copier(event)
+
+def roundToGrid(tick, grid):
+    return (tick + grid // 2) // grid * grid
+
+class Transpose:
+    def __init__(self, semitones):
+        self.semitones = semitones
+
+    def applyEvent(self, tick, event):
+        if type(event) in noteEvents:
+            note = event.note + self.semitones
+            # Notes moved out of range are dropped rather than folded onto the edges.
+            if not 0 <= note < 128: return None
+            event.note = note
+        return tick
+
+    def applyColumns(self, columns):
+        notes = columns.isin(noteStatuses)
+        note = columns.data1 + self.semitones
+        columns.keep &= ~notes | ((note >= 0) & (note < 128))
+        columns.data1[notes] = note[notes]
+
+class Quantize:
+    def __init__(self, grid):
+        if grid <= 0:
+            raise ValueError("The quantization grid must be positive.")
+        self.grid = grid
+
+    def applyEvent(self, tick, event):
+        return roundToGrid(tick, self.grid)
+
+    def applyColumns(self, columns):
+        columns.tick = roundToGrid(columns.tick, self.grid)
+
+class RemapChannels:
+    def __init__(self, mapping):
+        self.table = [mapping.get(channel, channel) for channel in range(16)]
+
+    def applyEvent(self, tick, event):
+        if type(event) in statusByChannelEvent: event.channel = self.table[event.channel]
+        return tick
+
+    def applyColumns(self, columns):
+        channelEvents = columns.status < 0xF0
+        columns.channel[channelEvents] = columns.numpy.asarray(self.table)[columns.channel[channelEvents]]
+
+class ScaleVelocity:
+    def __init__(self, factor):
+        self.factor = factor
+
+    def applyEvent(self, tick, event):
+        # Scaled note-ons keep a velocity of at least one, so they never turn into note-offs.
+        if type(event) is NoteOnEvent: event.velocity = max(1, min(127, round(event.velocity * self.factor)))
+        return tick
+
+    def applyColumns(self, columns):
+        numpy = columns.numpy
+        noteOns = columns.status == 0x90
+        velocity = numpy.clip(numpy.round(columns.data2[noteOns] * self.factor), 1, 127)
+        columns.data2[noteOns] = velocity.astype(columns.data2.dtype)
+
+class Filter:
+    def __init__(self, eventTypes):
+        # Tracks always keep their end of track event.
+        self.eventTypes = frozenset(eventTypes) | {EndOfTrackEvent}
+
+    def applyEvent(self, tick, event):
+        return tick if type(event) in self.eventTypes else None
+
+    def applyColumns(self, columns):
+        eventFilter = EventFilter(self.eventTypes)
+        keep = columns.isin(tuple(status for status in eventFilter.channelStatuses if status != 0x90))
+        if NoteOnEvent in self.eventTypes: keep |= (columns.status == 0x90)
+        keep |= (columns.status == 0xFF) & columns.numpy.isin(columns.data1, tuple(eventFilter.metaTypes | {0x2F}))
+        keep |= columns.isin(tuple(eventFilter.sysExStatuses))
+        columns.keep &= keep
+
+class ScaleTempo:
+    def __init__(self, factor):
+        if factor <= 0:
+            raise ValueError("The tempo factor must be positive.")
+        self.factor = factor
+
+    def scale(self, tempo):
+        return max(1, min(0xFFFFFF, round(tempo / self.factor)))
+
+    def applyEvent(self, tick, event):
+        if type(event) is TempoEvent: event.tempo = self.scale(event.tempo)
+        return tick
+
+    def applyColumns(self, columns):
+        for index in columns.numpy.flatnonzero((columns.status == 0xFF) & (columns.data1 == 0x51)).tolist():
+            tempo = self.scale(int.from_bytes(columns.payloads[index][:3], "big"))
+            columns.payloads[index] = tempo.to_bytes(3, "big")
+
+class TrackColumns:
+    # Working copies of the columns of a track, widened so stages can move
+    # values out of range before they are dropped.
+    def __init__(self, track):
+        import numpy
+        self.numpy = numpy
+        self.tick = track.tick.copy()
+        self.status = track.status
+        self.channel = track.channel.copy()
+        self.data1 = track.data1.astype(numpy.int64)
+        self.data2 = track.data2.copy()
+        self.payloads = dict(track.payloads)
+        self.keep = numpy.ones(len(track), dtype = bool)
+
+    def isin(self, statuses):
+        return self.numpy.isin(self.status, statuses)
+
+    def toTrackArrays(self):
+        from . columnar import TrackArrays
+        numpy = self.numpy
+        rows = numpy.flatnonzero(self.keep)
+        newRows = numpy.cumsum(self.keep) - 1
+        payloads = {int(newRows[index]) : payload for index, payload in self.payloads.items() if self.keep[index]}
+        tick = self.tick[rows]
+        deltaTime = numpy.diff(tick, prepend = 0).astype(numpy.uint32)
+        return TrackArrays(deltaTime, tick, self.status[rows], self.channel[rows],
+                           self.data1[rows].astype(numpy.uint8), self.data2[rows], payloads)
+
+class Pipeline:
+    def __init__(self, stages = ()):
+        self.stages = tuple(stages)
+
+    def then(self, stage):
+        return Pipeline(self.stages + (stage,))
+
+    def transpose(self, semitones):
+        return self.then(Transpose(semitones))
+
+    def quantize(self, grid):
+        return self.then(Quantize(grid))
+
+    def remapChannels(self, mapping):
+        return self.then(RemapChannels(mapping))
+
+    def scaleVelocity(self, factor):
+        return self.then(ScaleVelocity(factor))
+
+    def filter(self, eventTypes):
+        return self.then(Filter(eventTypes))
+
+    def scaleTempo(self, factor):
+        return self.then(ScaleTempo(factor))
+
+    def eventTypes(self):
+        # The types every filter stage keeps, so they can be pushed into the decoder.
+        eventTypes = None
+        for stage in self.stages:
+            if type(stage) is Filter:
+                eventTypes = stage.eventTypes if eventTypes is None else eventTypes & stage.eventTypes
+        return eventTypes
+
+    def iterTransformed(self, events, copyEvents = True):
+        stages = [stage.applyEvent for stage in self.stages]
+        tick = 0
+        previousTick = 0
+        for event in events:
+            tick += event.deltaTime
+            if copyEvents: event = copyEvent(event)
+            eventTick = tick
+            for stage in stages:
+                eventTick = stage(eventTick, event)
+                if eventTick is None: break
+            else:
+                event.deltaTime = eventTick - previousTick
+                previousTick = eventTick
+                yield event
+
+    def apply(self, midiFile):
+        tracks = [MidiTrack(list(self.iterTransformed(track.events))) for track in midiFile.tracks]
+        return MidiFile(midiFile.midiFormat, midiFile.ppqn, tracks)
+
+    def applyFile(self, source):
+        # Streams a file or buffer through the stages, so only the transformed
+        # events are ever held in memory.
+        if isinstance(source, (str, PathLike)):
+            with open(source, "rb") as f:
+                header = f.read(headerStruct.size)
+        else:
+            header = source
+        midiFormat, tracksCount, ppqn, offset = decodeHeader(header)
+        tracks = [MidiTrack([]) for i in range(tracksCount)]
+        for trackIndex, items in groupby(iterEvents(source, self.eventTypes()), key = itemgetter(0)):
+            events = (event for trackIndex, event in items)
+            tracks[trackIndex] = MidiTrack(list(self.iterTransformed(events, copyEvents = False)))
+        return MidiFile(midiFormat, ppqn, tracks)
+
+    def applyArrays(self, midiFileArrays):
+        from . columnar import MidiFileArrays
+        tracks = []
+        for track in midiFileArrays.tracks:
+            columns = TrackColumns(track)
+            for stage in self.stages:
+                stage.applyColumns(columns)
+            tracks.append(columns.toTrackArrays())
+        return MidiFileArrays(midiFileArrays.midiFormat, midiFileArrays.ppqn, tracks)
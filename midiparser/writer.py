@@ -0,0 +1,91 @@
+from operator import attrgetter
+from . parser import *
+
+# Events are encoded straight into a preallocated bytearray that grows by
+# doubling. Track chunk lengths are patched into the chunk headers once the
+# end of each track is reached, so the events are only visited once.
+
+dataGetterByEvent = {
+    eventClass : attrgetter(*dataFields)
+    for eventClass, dataFields in channelDataFieldsByEvent.items()
+}
+
+def reserve(buffer, offset, size):
+    if offset + size > len(buffer):
+        buffer.extend(bytes(max(len(buffer), size)))
+
+def writeVLQ(buffer, offset, value):
+    if value < 0x80:
+        buffer[offset] = value
+        return offset + 1
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    for byte in reversed(data):
+        buffer[offset] = byte
+        offset += 1
+    return offset
+
+def encodeEvents(events, buffer, offset, compressNoteOffs = True):
+    runningStatus = 0
+    lastEvent = None
+    for event in events:
+        eventClass = type(event)
+        reserve(buffer, offset, 8)
+        offset = writeVLQ(buffer, offset, event.deltaTime)
+        status = statusByChannelEvent.get(eventClass)
+        if status is not None:
+            data = dataGetterByEvent[eventClass](event)
+            # A note-on with zero velocity decodes as a note-off with zero
+            # velocity, and it can share running status with the note-ons.
+            if compressNoteOffs and status == 0x80 and data[1] == 0: status = 0x90
+            status |= event.channel
+            if status != runningStatus:
+                buffer[offset] = status
+                offset += 1
+                runningStatus = status
+            if channelDataSizeByStatus[status & 0xF0] == 2:
+                buffer[offset] = data[0]
+                buffer[offset + 1] = data[1]
+                offset += 2
+            else:
+                buffer[offset] = data
+                offset += 1
+        else:
+            payload = event.toPayload()
+            reserve(buffer, offset, len(payload) + 8)
+            if eventClass is SysExEvent:
+                buffer[offset] = 0xF0
+                offset += 1
+            elif eventClass is EscapeSequenceEvent:
+                buffer[offset] = 0xF7
+                offset += 1
+            else:
+                buffer[offset] = 0xFF
+                buffer[offset + 1] = metaTypeByEvent[eventClass]
+                offset += 2
+            offset = writeVLQ(buffer, offset, len(payload))
+            buffer[offset : offset + len(payload)] = payload
+            offset += len(payload)
+            runningStatus = 0
+        lastEvent = event
+    if type(lastEvent) is not EndOfTrackEvent:
+        reserve(buffer, offset, 4)
+        buffer[offset : offset + 4] = b"\x00\xFF\x2F\x00"
+        offset += 4
+    return offset
+
+def encodeMidiFile(midiFile, compressNoteOffs = True):
+    eventsCount = sum(len(track.events) for track in midiFile.tracks)
+    buffer = bytearray(14 + 8 * len(midiFile.tracks) + 4 * eventsCount + 64)
+    headerStruct.pack_into(buffer, 0, b"MThd", 6, midiFile.midiFormat, len(midiFile.tracks), midiFile.ppqn)
+    offset = 14
+    for track in midiFile.tracks:
+        reserve(buffer, offset, 8)
+        chunkStart = offset
+        offset = encodeEvents(track.events, buffer, offset + 8, compressNoteOffs)
+        chunkHeaderStruct.pack_into(buffer, chunkStart, b"MTrk", offset - chunkStart - 8)
+    del buffer[offset:]
+    return buffer
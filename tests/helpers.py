@@ -0,0 +1,48 @@
+import struct
+from midiparser.events import *
+
+def packVLQ(value):
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(data))
+
+def packTrack(data):
+    return b"MTrk" + struct.pack(">I", len(data)) + data
+
+def packFile(tracks, midiFormat = 1, ppqn = 480):
+    header = b"MThd" + struct.pack(">IHHH", 6, midiFormat, len(tracks), ppqn)
+    return header + b"".join(packTrack(data) for data in tracks)
+
+conductorTrack = (
+    packVLQ(0) + b"\xFF\x03\x09Conductor" +
+    packVLQ(0) + b"\xFF\x51\x03\x07\xA1\x20" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+pianoTrack = (
+    packVLQ(0) + b"\xC1\x05" +
+    packVLQ(0) + b"\x91\x3C\x40" +
+    packVLQ(240) + b"\x3C\x00" +
+    packVLQ(0) + b"\x3E\x50" +
+    packVLQ(480) + b"\x81\x3E\x20" +
+    packVLQ(0) + b"\xF0\x03\x7E\x09\xF7" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+pianoEvents = [
+    ProgramEvent(0, 1, 5),
+    NoteOnEvent(0, 1, 60, 64),
+    NoteOffEvent(240, 1, 60, 0),
+    NoteOnEvent(0, 1, 62, 80),
+    NoteOffEvent(480, 1, 62, 32),
+    SysExEvent(0, b"\x7E\x09\xF7"),
+    EndOfTrackEvent(0),
+]
+
+def writeFile(tmp_path, tracks):
+    filePath = tmp_path / "test.mid"
+    filePath.write_bytes(packFile(tracks))
+    return filePath
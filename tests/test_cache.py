@@ -0,0 +1,55 @@
+import os
+import pytest
+from midiparser.parser import *
+from . helpers import *
+
+numpy = pytest.importorskip("numpy")
+from midiparser.cache import *
+
+def assertArraysEqual(midiFileArrays, reference):
+    assert (midiFileArrays.midiFormat, midiFileArrays.ppqn) == (reference.midiFormat, reference.ppqn)
+    for track, referenceTrack in zip(midiFileArrays.tracks, reference.tracks):
+        for name, dtype in columnTypes:
+            assert numpy.array_equal(getattr(track, name), getattr(referenceTrack, name))
+        assert track.payloads == referenceTrack.payloads
+
+class TestParseCache:
+    def test_load(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        cache = ParseCache(tmp_path / "cache")
+
+        cold = cache.load(filePath)
+        warm = cache.load(filePath)
+
+        assert (cache.hits, cache.misses) == (1, 1)
+        assertArraysEqual(warm, cold)
+        assert cache.loadMidiFile(filePath) == MidiFile.fromFile(filePath)
+
+    def test_invalidation(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        cache = ParseCache(tmp_path / "cache")
+        cache.load(filePath)
+
+        filePath.write_bytes(packFile([pianoTrack]))
+        os.utime(filePath, ns = (0, 0))
+
+        assert cache.loadMidiFile(filePath).tracks[0].events == pianoEvents
+        assert cache.misses == 2
+
+    def test_corruptEntry(self, tmp_path):
+        filePath = writeFile(tmp_path, [pianoTrack])
+        cache = ParseCache(tmp_path / "cache", keyByContent = True)
+        cache.entryPath(filePath).write_bytes(b"garbage")
+
+        assert cache.loadMidiFile(filePath).tracks[0].events == pianoEvents
+        assert cache.load(filePath) and cache.hits == 1
+
+    def test_eviction(self, tmp_path):
+        cache = ParseCache(tmp_path / "cache", maxBytes = 1000)
+        for i in range(10):
+            filePath = tmp_path / f"{i}.mid"
+            filePath.write_bytes(packFile([pianoTrack] * (i % 3 + 1)))
+            cache.load(filePath)
+
+        assert 0 < len(cache.entries()) < 10
+        assert cache.totalBytes == sum(entry.stat().st_size for entry in cache.entries()) <= 1000
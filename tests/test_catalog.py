@@ -0,0 +1,93 @@
+import os
+import pytest
+from midiparser.catalog import *
+from . helpers import *
+
+slowTrack = (
+    packVLQ(0) + b"\xFF\x03\x04Slow" +
+    packVLQ(0) + b"\xFF\x51\x03\x0F\x42\x40" +
+    packVLQ(0) + b"\xC2\x30" +
+    packVLQ(0) + b"\x92\x30\x40" + packVLQ(960) + b"\x30\x00" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+# Plays at the default 120 BPM for a second, then slows down to 60 BPM.
+lateTempoTrack = (
+    packVLQ(0) + b"\x90\x3C\x40" + packVLQ(960) + b"\x3C\x00" +
+    packVLQ(0) + b"\xFF\x51\x03\x0F\x42\x40" +
+    packVLQ(0) + b"\x90\x3E\x40" + packVLQ(480) + b"\x3E\x00" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+def writeTree(tmp_path):
+    (tmp_path / "songs" / "slow").mkdir(parents = True)
+    (tmp_path / "songs" / "fast.mid").write_bytes(packFile([conductorTrack, pianoTrack]))
+    (tmp_path / "songs" / "slow" / "slow.MID").write_bytes(packFile([slowTrack]))
+    (tmp_path / "songs" / "broken.mid").write_bytes(packFile([b"\x00\xF1\x00"]))
+    (tmp_path / "songs" / "notes.txt").write_text("not a MIDI file")
+    return tmp_path / "songs"
+
+class TestCatalog:
+    def test_update(self, tmp_path):
+        root = writeTree(tmp_path)
+
+        with Catalog(tmp_path / "catalog.db") as catalog:
+            assert catalog.update(root) == CatalogUpdate(added = 3, failed = 1)
+            assert len(catalog) == 3
+
+            entry = catalog.entry(root / "fast.mid")
+            assert (entry.midiFormat, entry.tracksCount, entry.ppqn) == (1, 2, 480)
+            assert entry.trackNames == ["Conductor"]
+            assert entry.programs == [5]
+            assert (entry.notesCount, entry.lowestPitch, entry.highestPitch) == (2, 60, 62)
+            assert entry.minTempo == entry.maxTempo == pytest.approx(120)
+            assert entry.duration == pytest.approx(0.75)
+            assert catalog.entry(root / "broken.mid").error.startswith("ValueError")
+
+    def test_incremental(self, tmp_path):
+        root = writeTree(tmp_path)
+        catalog = Catalog(tmp_path / "catalog.db", useHash = True)
+        catalog.update(root)
+
+        assert catalog.update(root) == CatalogUpdate(unchanged = 3)
+
+        # Touching a file without changing it only refreshes its identity.
+        os.utime(root / "fast.mid", ns = (0, 0))
+        assert catalog.update(root) == CatalogUpdate(unchanged = 3)
+
+        (root / "fast.mid").write_bytes(packFile([slowTrack]))
+        os.remove(root / "broken.mid")
+        assert catalog.update(root) == CatalogUpdate(updated = 1, unchanged = 1, removed = 1)
+        assert catalog.entry(root / "fast.mid").trackNames == ["Slow"]
+        catalog.close()
+
+        with Catalog(tmp_path / "catalog.db") as catalog:
+            assert len(catalog) == 2
+
+    def test_query(self, tmp_path):
+        root = writeTree(tmp_path)
+
+        with Catalog(tmp_path / "catalog.db") as catalog:
+            catalog.update(root, workers = 2)
+
+            def paths(**filters):
+                return [os.path.basename(entry.path) for entry in catalog.query(**filters)]
+
+            assert paths() == ["fast.mid", "slow.MID"]
+            assert paths(maxTempo = 90) == ["slow.MID"]
+            assert paths(minDuration = 1.5) == ["slow.MID"]
+            assert paths(program = 5) == ["fast.mid"]
+            assert paths(trackName = "cond") == ["fast.mid"]
+            assert paths(minPitch = 50) == ["fast.mid"]
+            assert paths(errors = True) == ["broken.mid"]
+
+    def test_lateTempoChange(self, tmp_path):
+        (tmp_path / "late.mid").write_bytes(packFile([lateTempoTrack]))
+
+        with Catalog(tmp_path / "catalog.db") as catalog:
+            catalog.update(tmp_path)
+
+            entry = catalog.entry(tmp_path / "late.mid")
+            assert (entry.minTempo, entry.maxTempo) == (pytest.approx(60), pytest.approx(120))
+            assert len(catalog.query(minTempo = 100)) == 1
+            assert len(catalog.query(maxTempo = 90)) == 1
@@ -0,0 +1,86 @@
+import pytest
+from midiparser.parser import *
+from . helpers import *
+
+numpy = pytest.importorskip("numpy")
+from midiparser.columnar import *
+
+class TestTrackArrays:
+    def test_fromEvents(self):
+        arrays = TrackArrays.fromEvents(pianoEvents)
+
+        assert arrays.tick.tolist() == [0, 0, 240, 240, 720, 720, 720]
+        assert arrays.status.tolist() == [0xC0, 0x90, 0x80, 0x90, 0x80, 0xF0, 0xFF]
+        assert arrays.channel.tolist() == [1, 1, 1, 1, 1, 0, 0]
+        assert arrays.data1.tolist() == [5, 60, 60, 62, 62, 0, 0x2F]
+        assert arrays.data2.tolist() == [0, 64, 0, 80, 32, 0, 0]
+        assert arrays.payloads == {5 : b"\x7E\x09\xF7", 6 : b""}
+
+    def test_roundTrip(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        midiFile = MidiFile.fromFile(filePath)
+
+        assert midiFile.toArrays().toMidiFile() == midiFile
+
+    def test_fromFile(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        midiFile = MidiFile.fromFile(filePath)
+
+        midiFileArrays = MidiFileArrays.fromFile(filePath)
+
+        assert midiFileArrays.ppqn == 480
+        for arrays, track in zip(midiFileArrays.tracks, midiFile.tracks):
+            reference = track.toArrays()
+            assert arrays.payloads == reference.payloads
+            for column in ("deltaTime", "tick", "status", "channel", "data1", "data2"):
+                assert numpy.array_equal(getattr(arrays, column), getattr(reference, column))
+
+    def test_merged(self):
+        midiFile = MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack, conductorTrack]))
+
+        arrays, trackIndex = midiFile.toArrays().merged()
+
+        merged = list(midiFile.iterMerged())
+        assert arrays.tick.tolist() == [tick for tick, index, event in merged]
+        assert trackIndex.tolist() == [index for tick, index, event in merged]
+        assert arrays.toEvents()[8:] == [
+            NoteOffEvent(240, 1, 60, 0), NoteOnEvent(0, 1, 62, 80),
+            NoteOffEvent(480, 1, 62, 32), SysExEvent(0, b"\x7E\x09\xF7"), EndOfTrackEvent(0),
+        ]
+
+    def test_fromChunk(self):
+        runningTrack = (
+            packVLQ(0) + b"\xB2\x07\x64" + packVLQ(0x0FFFFFFF) + b"\x0A\x40" +
+            packVLQ(5) + b"\xC3\x02" + packVLQ(5) + b"\x03" +
+            packVLQ(0) + b"\xF7\x01\xF8" + packVLQ(0) + b"\xFF\x2F\x00"
+        )
+        # A delta time padded to five bytes is left to the scalar path.
+        longDeltaTrack = b"\x80\x80\x80\x80\x00\xFF\x2F\x00"
+        tracks = [conductorTrack, pianoTrack, runningTrack, longDeltaTrack]
+        buffer = packFile(tracks)
+        offset = 14
+        for track in tracks:
+            bulk = TrackArrays.fromChunk(buffer, offset + 8, len(track), minimumLength = 0)
+            scalar = TrackArrays.fromBuffer(buffer, offset + 8)
+            offset += 8 + len(track)
+            for name in ("deltaTime", "tick", "status", "channel", "data1", "data2"):
+                assert getattr(bulk, name).tolist() == getattr(scalar, name).tolist()
+            assert bulk.payloads == scalar.payloads
+
+class TestNoteArrays:
+    def test_matchesExtractNotes(self, tmp_path):
+        from midiparser.notes import extractNotes
+        overlappingTrack = (
+            packVLQ(0) + b"\x90\x40\x40" + packVLQ(10) + b"\x40\x50" +
+            packVLQ(10) + b"\x80\x40\x00" + packVLQ(5) + b"\x80\x41\x00" +
+            packVLQ(5) + b"\x80\x40\x00" + packVLQ(0) + b"\x90\x40\x60" +
+            packVLQ(20) + b"\xFF\x2F\x00"
+        )
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack, overlappingTrack])
+
+        notes = MidiFileArrays.fromFile(filePath).notes()
+
+        expected = [(note.start, note.end, note.channel, note.pitch, note.velocity, note.track)
+            for note in extractNotes(MidiFile.fromFile(filePath))]
+        assert list(zip(*[column.tolist() for column in (notes.start, notes.end, notes.channel,
+                                                         notes.pitch, notes.velocity, notes.track)])) == expected
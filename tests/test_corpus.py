@@ -0,0 +1,55 @@
+import os
+from midiparser.corpus import *
+from midiparser.parser import MidiFile
+from . helpers import *
+
+def writeCorpus(tmp_path):
+    paths = []
+    for i in range(6):
+        filePath = tmp_path / f"{i}.mid"
+        filePath.write_bytes(packFile([conductorTrack, pianoTrack]))
+        paths.append(filePath)
+    brokenPath = tmp_path / "broken.mid"
+    brokenPath.write_bytes(packFile([b"\x00\xFF\x60\x00" + pianoTrack]))
+    return paths, brokenPath
+
+def parseOrCrash(path):
+    if os.path.basename(path) == "crash.mid": os._exit(1)
+    return MidiFile.fromFile(path)
+
+class TestParseCorpus:
+    def test_parseCorpus(self, tmp_path):
+        paths, brokenPath = writeCorpus(tmp_path)
+        progress = []
+
+        results = list(parseCorpus(paths + [brokenPath, tmp_path / "missing.mid"], workers = 2,
+                                   onProgress = lambda stats: progress.append(stats.filesDone)))
+
+        resultByPath = {result.path : result for result in results}
+        assert len(results) == 8
+        assert all(resultByPath[str(path)].value.toMidiFile().tracks[1].events == pianoEvents for path in paths)
+        assert resultByPath[str(brokenPath)].error.startswith("KeyError")
+        assert not resultByPath[str(tmp_path / "missing.mid")].ok
+        assert progress == list(range(1, 9))
+
+    def test_parseCorpusSerial(self, tmp_path):
+        paths, brokenPath = writeCorpus(tmp_path)
+
+        results = list(parseCorpus(paths + [brokenPath], workers = 1))
+
+        assert [result.ok for result in results] == [True] * 6 + [False]
+        assert results[0].value.toMidiFile() == MidiFile.fromFile(paths[0])
+
+    def test_parseCorpusWorkerCrash(self, tmp_path):
+        paths, brokenPath = writeCorpus(tmp_path)
+        paths = paths * 5
+        crashPath = tmp_path / "crash.mid"
+        crashPath.write_bytes(paths[0].read_bytes())
+
+        results = list(parseCorpus(paths[:10] + [crashPath] + paths[10:], workers = 2, function = parseOrCrash))
+
+        assert len(results) == 31
+        # The files in flight with the crash are parsed again, and only the crashing one fails.
+        assert [(result.path, result.error) for result in results if not result.ok] == [
+            (str(crashPath), "BrokenProcessPool: a worker process died")]
+        assert sorted(result.path for result in results if result.ok) == sorted(map(str, paths))
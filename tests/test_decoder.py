@@ -0,0 +1,44 @@
+from io import BytesIO
+from midiparser.parser import *
+from . helpers import *
+
+class TestDecoder:
+    def test_decodeVLQ(self):
+        for value in (0, 0x40, 0x7F, 0x80, 0x2000, 0x3FFF, 0x4000, 0x100000, 0x0FFFFFFF):
+            data = b"\x00" + packVLQ(value)
+            assert decodeVLQ(data, 1) == (value, len(data))
+            assert unpackVLQ(BytesIO(packVLQ(value))) == value
+
+    def test_decodeEvents(self):
+        events, offset = decodeEvents(pianoTrack, 0, MidiParseState())
+
+        assert events == pianoEvents
+        assert offset == len(pianoTrack)
+
+    def test_decodeMetaEvents(self):
+        for eventType, eventClass in metaEventByType.items():
+            payload = {
+                0x00 : b"\x00\x07", 0x20 : b"\x03", 0x21 : b"\x01", 0x2F : b"",
+                0x51 : b"\x07\xA1\x20", 0x54 : b"\x01\x02\x03\x18\x04",
+                0x58 : b"\x06\x03\x24\x08", 0x59 : b"\xFD\x01",
+            }.get(eventType, b"Some \xE9 text")
+            data = packVLQ(200) + bytes((0xFF, eventType)) + packVLQ(len(payload)) + payload
+
+            event, offset = decodeEvent(data, 0, MidiParseState())
+
+            assert event == eventClass.fromMemoryMap(200, len(payload), BytesIO(payload))
+            assert event.toPayload() == payload
+            assert offset == len(data)
+
+    def test_decodeEventsZeroCopy(self):
+        buffer = memoryview(pianoTrack)
+
+        events, offset = decodeEvents(buffer, 0, MidiParseState())
+
+        assert isinstance(events[5].data, memoryview)
+        assert events == pianoEvents
+
+    def test_fromBuffer(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+
+        assert MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack])) == MidiFile.fromFile(filePath)
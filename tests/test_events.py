@@ -333,3 +333,11 @@ class TestSysExEvents:
 
         assert referenceEvent == parsedEvent
 
+
+class TestEventModel:
+    def test_slots(self):
+        event = NoteOnEvent(100, 2, 45, 64)
+
+        assert not hasattr(event, "__dict__")
+        assert event == NoteOnEvent(100, 2, 45, 64)
+        assert event != NoteOffEvent(100, 2, 45, 64)
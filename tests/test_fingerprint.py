@@ -0,0 +1,72 @@
+import pytest
+from midiparser.parser import *
+from . helpers import *
+
+numpy = pytest.importorskip("numpy")
+from midiparser.fingerprint import *
+
+def melodyTrack(pitches, channel = 0, ticksPerNote = 240, velocity = 80):
+    # Alternate long and short notes so the rhythm shows up in the tokens.
+    track = b""
+    for i, pitch in enumerate(pitches):
+        length = ticksPerNote * (2 if i % 3 == 0 else 1)
+        track += packVLQ(0) + bytes([0x90 | channel, pitch, velocity])
+        track += packVLQ(length) + bytes([0x80 | channel, pitch, 0])
+    return track + packVLQ(0) + b"\xFF\x2F\x00"
+
+melody = [60, 62, 64, 65, 67, 65, 64, 62, 60, 67, 72, 71, 69, 67, 65, 64, 62, 60, 59, 60]
+
+class TestFingerprint:
+    def test_invariance(self):
+        original = fingerprint(packFile([conductorTrack, melodyTrack(melody)]))
+        # Transposed, on another channel, at twice the resolution and without the conductor track.
+        variant = fingerprint(packFile([melodyTrack([pitch + 5 for pitch in melody], 3, 480)], ppqn = 960))
+        different = fingerprint(packFile([melodyTrack(list(reversed(melody)))]))
+
+        assert original.notesCount == len(melody)
+        assert original.similarity(variant) == 1.0
+        assert original.similarity(different) < 0.5
+
+    def test_sources(self, tmp_path):
+        buffer = packFile([conductorTrack, melodyTrack(melody)])
+        filePath = writeFile(tmp_path, [conductorTrack, melodyTrack(melody)])
+
+        signatures = [fingerprint(source).signature for source in (buffer, filePath, MidiFile.fromBuffer(buffer))]
+
+        assert numpy.array_equal(signatures[0], signatures[1])
+        assert numpy.array_equal(signatures[0], signatures[2])
+        with open(filePath, "rb") as f:
+            assert numpy.array_equal(signatures[0], fingerprint(f).signature)
+
+    def test_empty(self):
+        conductor = fingerprint(packFile([conductorTrack]))
+        sysEx = fingerprint(packFile([packVLQ(0) + b"\xF0\x03\x7E\x09\xF7" + packVLQ(0) + b"\xFF\x2F\x00"]))
+
+        assert conductor.shinglesCount == sysEx.shinglesCount == 0
+        assert conductor.similarity(sysEx) == 0.0
+
+class TestLSHIndex:
+    def test_query(self):
+        index = LSHIndex()
+        for i in range(10):
+            pitches = [(pitch * (i + 3)) % 40 + 40 for pitch in melody]
+            index.add(f"song{i}", fingerprint(packFile([melodyTrack(pitches)])))
+        duplicate = fingerprint(packFile([melodyTrack([(pitch * 5) % 40 + 52 for pitch in melody], 9)]))
+        index.add("copy", duplicate)
+
+        assert sorted(key for key, similarity in index.query(duplicate)) == ["copy", "song2"]
+        assert [(first, second) for first, second, similarity in index.duplicates()] in (
+            [("song2", "copy")], [("copy", "song2")])
+        with pytest.raises(ValueError):
+            LSHIndex(bandsCount = 5)
+
+    def test_empty(self):
+        index = LSHIndex()
+        empty = fingerprint(packFile([conductorTrack]))
+        index.add("conductor", empty)
+        index.add("other", fingerprint(packFile([conductorTrack, conductorTrack])))
+        index.add("song", fingerprint(packFile([melodyTrack(melody)])))
+
+        assert len(index) == 3
+        assert index.query(empty) == []
+        assert index.duplicates() == []
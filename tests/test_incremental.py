@@ -0,0 +1,41 @@
+import pytest
+import asyncio
+from midiparser.incremental import *
+from . helpers import *
+
+data = packFile([conductorTrack, pianoTrack + b"\x00\x00", pianoTrack])
+
+expectedEvents = [
+    (trackIndex, event)
+    for trackIndex, track in enumerate(MidiFile.fromBuffer(data).tracks) for event in track.events
+]
+
+class TestMidiPushParser:
+    @pytest.mark.parametrize("chunkSize", [1, 2, 3, 7, 64, len(data)])
+    def test_feed(self, chunkSize):
+        parser = MidiPushParser()
+
+        events = []
+        for i in range(0, len(data), chunkSize):
+            events.extend(parser.feed(data[i : i + chunkSize]))
+        parser.close()
+
+        assert events == expectedEvents
+        assert all(type(event.data) is bytes for trackIndex, event in events if hasattr(event, "data"))
+        assert (parser.midiFormat, parser.tracksCount, parser.ppqn) == (1, 3, 480)
+
+    def test_truncated(self):
+        parser = MidiPushParser()
+        parser.feed(data[:-5])
+
+        with pytest.raises(EOFError):
+            parser.close()
+
+    def test_iterEventsAsync(self):
+        async def parse():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return [item async for item in iterEventsAsync(reader, chunkSize = 5)]
+
+        assert asyncio.run(parse()) == expectedEvents
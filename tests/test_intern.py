@@ -0,0 +1,72 @@
+import gc
+import pytest
+import tracemalloc
+from midiparser.intern import *
+from . helpers import *
+
+repeatedTrack = b"".join(packVLQ(10) + b"\xB0\x07\x64" for i in range(20)) + (
+    packVLQ(0) + b"\xFF\x04\x05Piano" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+class TestInterning:
+    def test_roundTrip(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack, repeatedTrack])
+        midiFile = MidiFile.fromFile(filePath)
+
+        interned = InternedMidiFile.fromFile(filePath)
+
+        assert interned.toMidiFile() == midiFile
+        assert midiFile.toInterned().toMidiFile() == midiFile
+        assert interned.tracks[1][1] == pianoEvents[1]
+
+    def test_sharing(self, tmp_path):
+        filePath = writeFile(tmp_path, [repeatedTrack, repeatedTrack])
+        pool = EventPool()
+
+        interned = InternedMidiFile.fromFile(filePath, pool)
+
+        first, second = interned.tracks
+        assert set(first.eventIds[:20]) == {first.eventIds[0]}
+        assert first.eventIds == second.eventIds
+        assert list(first.deltaTimes[:3]) == [10, 10, 10]
+        assert len(pool) == 3
+        names = [pool.event(eventId, 0).name for eventId in (first.eventIds[20], second.eventIds[20])]
+        assert names[0] is names[1]
+
+        report = interned.report()
+        assert (report.events, report.uniqueEvents) == (44, 3)
+        assert report.savedBytes == report.bytesBefore - report.bytesAfter
+
+    def test_reportMatchesTracedMemory(self):
+        # Few distinct notes with many distinct delta times, long enough for
+        # the interned form to pay for its pool.
+        track = b"".join(packVLQ(i % 300 * 7) + bytes([0x90, i % 12 + 60, i % 3 + 1]) for i in range(4000))
+        data = packFile([track + packVLQ(0) + b"\xFF\x2F\x00"] * 2)
+
+        gc.collect()
+        tracemalloc.start()
+        midiFile = MidiFile.fromBuffer(data)
+        plainBytes = tracemalloc.get_traced_memory()[0]
+        interned = midiFile.toInterned()
+        internedBytes = tracemalloc.get_traced_memory()[0] - plainBytes
+        tracemalloc.stop()
+
+        report = interned.report()
+        assert report.bytesBefore == pytest.approx(plainBytes, rel = 0.1)
+        assert report.bytesAfter == pytest.approx(internedBytes, rel = 0.1)
+        assert report.savedRatio > 0.5
+
+    def test_eventsAreCopies(self, tmp_path):
+        filePath = writeFile(tmp_path, [repeatedTrack, repeatedTrack])
+        interned = InternedMidiFile.fromFile(filePath)
+
+        event = interned.tracks[0][0]
+        event.value = 1
+        for track in interned.tracks:
+            for event in track:
+                event.deltaTime = 0
+
+        assert interned.tracks[0][0] == ControllerEvent(10, 0, 7, 100)
+        assert interned.tracks[1][1] == ControllerEvent(10, 0, 7, 100)
+        assert interned.toMidiFile() == MidiFile.fromFile(filePath)
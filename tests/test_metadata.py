@@ -0,0 +1,29 @@
+import pytest
+from midiparser.metadata import *
+from . helpers import *
+
+signatureTrack = (
+    packVLQ(0) + b"\xFF\x58\x04\x06\x03\x24\x08" +
+    packVLQ(960) + b"\xFF\x59\x02\xFD\x01" +
+    packVLQ(0) + b"\xFF\x04\x05Piano" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+class TestScanMetadata:
+    def test_scanMetadata(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack, signatureTrack])
+
+        metadata = scanMetadata(filePath)
+
+        assert (metadata.midiFormat, metadata.tracksCount, metadata.ppqn) == (1, 3, 480)
+        assert metadata.trackNames == ["Conductor", None, None]
+        assert metadata.instrumentNames == ["Piano"]
+        assert metadata.tempoChanges == [(0, 500000)]
+        assert metadata.timeSignatures == [(0, TimeSignatureEvent(0, 6, 3, 36, 8))]
+        assert metadata.keySignatures == [(960, KeySignatureEvent(960, 253, 1))]
+        assert metadata.programs == {1 : {5}}
+        assert metadata.eventsCount == 14
+        assert metadata.notesCount == 2
+        assert (metadata.lowestPitch, metadata.highestPitch) == (60, 62)
+        assert metadata.totalTicks == 960
+        assert metadata.duration == pytest.approx(1.0)
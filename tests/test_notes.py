@@ -0,0 +1,41 @@
+import random
+from midiparser.notes import *
+from midiparser.parser import *
+from . helpers import *
+
+class TestNotes:
+    def test_extractNotes(self):
+        midiFile = MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack]))
+
+        assert extractNotes(midiFile) == [Note(0, 240, 1, 60, 64, 1), Note(240, 720, 1, 62, 80, 1)]
+
+    def test_overlappingSamePitch(self):
+        events = [
+            NoteOnEvent(0, 0, 60, 100),
+            NoteOnEvent(10, 0, 60, 90),
+            NoteOffEvent(10, 0, 60, 0),
+            NoteOffEvent(10, 0, 60, 0),
+            NoteOnEvent(0, 0, 64, 80),
+            NoteOffEvent(5, 0, 61, 0),
+            EndOfTrackEvent(15),
+        ]
+
+        assert extractTrackNotes(events) == [
+            Note(0, 20, 0, 60, 100, 0), Note(10, 30, 0, 60, 90, 0), Note(30, 50, 0, 64, 80, 0),
+        ]
+
+class TestNoteIndex:
+    def test_queries(self):
+        generator = random.Random(0)
+        notes = []
+        for i in range(500):
+            start = generator.randrange(10000)
+            notes.append(Note(start, start + generator.randrange(1, 500), 0, generator.randrange(128), 64, 0))
+        noteIndex = NoteIndex(notes)
+
+        for i in range(100):
+            start = generator.randrange(10500)
+            end = start + generator.randrange(1, 1000)
+            expected = [note for note in noteIndex.notes if note.start < end and note.end > start]
+            assert noteIndex.overlapping(start, end) == expected
+            assert noteIndex.at(start) == [note for note in noteIndex.notes if note.start <= start < note.end]
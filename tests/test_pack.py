@@ -0,0 +1,77 @@
+import pytest
+from midiparser.pack import *
+from . helpers import *
+
+def writeFiles(tmp_path, count):
+    paths = []
+    for i in range(count):
+        filePath = tmp_path / f"{i}.mid"
+        filePath.write_bytes(packFile([conductorTrack, pianoTrack] if i % 2 else [pianoTrack]))
+        paths.append(filePath)
+    return paths
+
+class TestPack:
+    def test_roundTrip(self, tmp_path):
+        paths = writeFiles(tmp_path, 5)
+
+        shardsCount = packFiles(paths, tmp_path / "pack", shardBytes = 200, key = lambda path: path.stem)
+
+        assert shardsCount > 1
+        with PackReader(tmp_path / "pack") as reader:
+            assert len(reader) == 5
+            assert sorted(reader.keys()) == ["0", "1", "2", "3", "4"]
+            for path in paths:
+                assert reader.get(path.stem) == MidiFile.fromFile(path)
+                assert reader.getBytes(path.stem) == path.read_bytes()
+            assert reader[-1] == reader["4"]
+            assert reader.get("1", eventTypes = {NoteOnEvent}).tracks[1].events == [
+                NoteOnEvent(0, 1, 60, 64), NoteOnEvent(240, 1, 62, 80)]
+            with pytest.raises(IndexError):
+                reader.get(5)
+
+    def test_parsedFilesAndDuplicates(self, tmp_path):
+        midiFile = MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack]))
+
+        with PackWriter(tmp_path) as writer:
+            writer.add("song", midiFile)
+            with pytest.raises(ValueError):
+                writer.add("song", b"")
+
+        with PackReader(tmp_path) as reader:
+            assert reader["song"] == midiFile
+
+    def test_append(self, tmp_path):
+        data = packFile([pianoTrack])
+        with PackWriter(tmp_path, shardBytes = 100) as writer:
+            for i in range(4):
+                writer.add(f"a{i}", data)
+
+        with PackWriter(tmp_path, shardBytes = 100) as writer:
+            writer.add("b0", data)
+            with pytest.raises(ValueError):
+                writer.add("a0", data)
+
+        with PackReader(tmp_path) as reader:
+            assert sorted(reader.keys()) == ["a0", "a1", "a2", "a3", "b0"]
+            assert all(reader.getBytes(key) == data for key in reader.keys())
+
+    def test_duplicateKeysAcrossShards(self, tmp_path):
+        with PackWriter(tmp_path, prefix = "first") as writer:
+            writer.add("song", packFile([pianoTrack]))
+        # Shards written apart and then moved into one pack.
+        with PackWriter(tmp_path / "other", prefix = "second") as writer:
+            writer.add("song", packFile([conductorTrack]))
+        (tmp_path / "other" / "second-00000.midpack").rename(tmp_path / "second-00000.midpack")
+
+        with pytest.raises(ValueError):
+            PackReader(tmp_path)
+
+    def test_iterShuffled(self, tmp_path):
+        packFiles(writeFiles(tmp_path, 6), tmp_path / "pack", key = lambda path: path.stem)
+
+        with PackReader(tmp_path / "pack") as reader:
+            first = [key for key, midiFile in reader.iterShuffled(seed = 1, worker = 0, workers = 2)]
+            second = [key for key, midiFile in reader.iterShuffled(seed = 1, worker = 1, workers = 2)]
+
+        assert len(first) == len(second) == 3
+        assert sorted(first + second) == ["0", "1", "2", "3", "4", "5"]
@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor
+from midiparser.parser import *
+from . helpers import *
+
+class TestMidiFile:
+    def test_fromFile(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+
+        midiFile = MidiFile.fromFile(filePath)
+
+        assert midiFile.midiFormat == 1
+        assert midiFile.ppqn == 480
+        assert midiFile.tracks[0].events[1] == TempoEvent(0, 500000)
+        assert midiFile.tracks[1].events == pianoEvents
+
+    def test_fromFileLazy(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack, pianoTrack])
+
+        with MidiFile.fromFile(filePath, lazy = True) as midiFile:
+            assert len(midiFile.tracks) == 3
+            assert not any(midiFile.tracks.isLoaded(i) for i in range(3))
+
+            track = midiFile.tracks[2]
+            assert track.events == pianoEvents
+            assert midiFile.tracks.isLoaded(2)
+            assert not midiFile.tracks.isLoaded(1)
+            assert midiFile.tracks[-1] is track
+
+            assert [track.events for track in midiFile.tracks] == [
+                track.events for track in MidiFile.fromFile(filePath).tracks]
+
+    def test_fromFileParallel(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack] + [pianoTrack] * 4)
+
+        midiFile = MidiFile.fromFile(filePath, workers = 2)
+
+        assert midiFile == MidiFile.fromFile(filePath)
+        with ProcessPoolExecutor(max_workers = 2) as executor:
+            for i in range(2):
+                assert MidiFile.fromFile(filePath, executor = executor) == midiFile
+
+    def test_compactTrack(self):
+        events = [
+            TrackNameEvent(0, "Mixed"), NoteOnEvent(0, 1, 60, 64), NoteOffEvent(0x0FFFFFFF, 1, 60, 0),
+            NotePressureEvent(1, 2, 61, 10), ControllerEvent(2, 3, 7, 100), ProgramEvent(3, 4, 5),
+            SysExEvent(0, b"\x7E\x09\xF7"), ChannelPressureEvent(4, 5, 6), PitchBendEvent(5, 6, 0, 64),
+            EndOfTrackEvent(0),
+        ]
+
+        assert CompactTrack.fromTrack(MidiTrack(events)).toTrack().events == events
+        assert CompactTrack.fromTrack(MidiTrack([])).toTrack().events == []
+
+    def test_iterMerged(self):
+        midiFile = MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack, conductorTrack]))
+
+        merged = list(midiFile.iterMerged())
+
+        assert [(tick, trackIndex) for tick, trackIndex, event in merged] == [
+            (0, 0), (0, 0), (0, 0), (0, 1), (0, 1), (0, 2), (0, 2), (0, 2),
+            (240, 1), (240, 1), (720, 1), (720, 1), (720, 1),
+        ]
+        assert [event for tick, trackIndex, event in merged if trackIndex == 1] == pianoEvents
+
+    def test_fromFileEventTypes(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+
+        notes = MidiFile.fromFile(filePath, eventTypes = {NoteOffEvent})
+        tempos = MidiFile.fromFile(filePath, eventTypes = {TempoEvent, EndOfTrackEvent}, workers = 2)
+
+        assert notes.tracks[0].events == []
+        assert notes.tracks[1].events == [NoteOffEvent(240, 1, 60, 0), NoteOffEvent(480, 1, 62, 32)]
+        assert tempos.tracks[0].events == [TempoEvent(0, 500000), EndOfTrackEvent(0)]
+        assert tempos.tracks[1].events == [EndOfTrackEvent(720)]
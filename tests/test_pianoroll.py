@@ -0,0 +1,45 @@
+import pytest
+from midiparser.parser import *
+from . helpers import *
+
+numpy = pytest.importorskip("numpy")
+from midiparser.pianoroll import *
+
+def makeMidiFile():
+    return MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack]))
+
+class TestPianoRoll:
+    def test_ticks(self):
+        roll = pianoRoll(makeMidiFile(), 240)
+
+        assert roll.shape == (128, 3)
+        assert roll[60].tolist() == [64, 0, 0]
+        assert roll[62].tolist() == [0, 80, 80]
+        assert roll.sum() == 64 + 160
+
+    def test_secondsAndOptions(self):
+        # 120 BPM at 480 ppqn, so a quarter of a second is 240 ticks.
+        roll = pianoRoll(makeMidiFile(), 0.25, unit = "seconds", binary = True, pitchRange = (60, 64), length = 2)
+
+        assert roll.tolist() == [[1, 0], [0, 0], [0, 1], [0, 0]]
+        with pytest.raises(ValueError):
+            pianoRoll(makeMidiFile(), 1, unit = "beats")
+
+    def test_sparseStacking(self):
+        sparse = sparsePianoRoll(makeMidiFile(), 240, stack = "track")
+
+        assert sparse.shape == (2, 128, 3)
+        assert sparse.coordinates.tolist() == [[1, 1, 1], [60, 62, 62], [0, 1, 2]]
+        assert sparse.values.tolist() == [64, 80, 80]
+        assert pianoRoll(makeMidiFile(), 240, stack = "channel")[1].tolist() == sparse.toDense()[1].tolist()
+
+    def test_batch(self):
+        roll = pianoRoll(makeMidiFile(), 240)
+
+        batch, lengths = batchPianoRolls([roll, roll[:, :1]])
+
+        assert batch.shape == (2, 128, 3)
+        assert lengths.tolist() == [3, 1]
+        assert batch[1, 62].tolist() == [0, 0, 0]
+        with pytest.raises(ValueError):
+            batchPianoRolls([roll, roll[:10]])
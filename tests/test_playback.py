@@ -0,0 +1,75 @@
+import pytest
+from midiparser.playback import *
+from midiparser.parser import *
+from . helpers import *
+
+# Two beats at 120 BPM, then a change to 60 BPM at tick 960.
+tempoTrack = (
+    packVLQ(0) + b"\xFF\x51\x03\x07\xA1\x20" +
+    packVLQ(960) + b"\xFF\x51\x03\x0F\x42\x40" +
+    packVLQ(960) + b"\xFF\x2F\x00"
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # Overshoot slightly, like a real sleep, so every wait makes progress.
+        self.now += seconds + 1e-9
+
+def makeScheduler(callback, **options):
+    midiFile = MidiFile.fromBuffer(packFile([tempoTrack, pianoTrack]))
+    clock = FakeClock()
+    return PlaybackScheduler(midiFile, callback, spin = 0, clock = clock, sleep = clock.sleep, **options), clock
+
+class TestPlaybackScheduler:
+    def test_schedule(self):
+        dispatched = []
+        scheduler, clock = makeScheduler(lambda batch: dispatched.append((clock.now, batch)))
+
+        scheduler.run()
+
+        times = [deadline - 100.0 for now, batch in dispatched for deadline, trackIndex, event in batch]
+        assert times == pytest.approx(scheduler.times)
+        assert scheduler.times[-1] == pytest.approx(3.0)
+        assert scheduler.done
+        assert scheduler.jitter.count == len(dispatched)
+        assert scheduler.jitter.maximum < 1e-6
+
+    def test_lookaheadBatching(self):
+        batches = []
+        scheduler, clock = makeScheduler(batches.append, lookahead = 10.0)
+
+        scheduler.run()
+
+        assert len(batches) == 1
+        assert len(batches[0]) == len(scheduler.events)
+
+    def test_seekAndTempoScale(self):
+        batches = []
+        scheduler, clock = makeScheduler(batches.append, tempoScale = 2.0)
+        scheduler.seek(1.0)
+
+        scheduler.run()
+
+        events = [event for batch in batches for deadline, trackIndex, event in batch]
+        assert len(events) == len([seconds for seconds in scheduler.times if seconds >= 1.0])
+        assert clock.now - 100.0 == pytest.approx(1.0)
+
+        with pytest.raises(ValueError):
+            scheduler.setTempoScale(0)
+
+    def test_thread(self):
+        batches = []
+        midiFile = MidiFile.fromBuffer(packFile([pianoTrack], ppqn = 48000))
+
+        with PlaybackScheduler(midiFile, batches.append) as scheduler:
+            scheduler.join(5)
+
+        assert scheduler.done
+        assert sum(len(batch) for batch in batches) == len(midiFile.tracks[0].events)
+        assert scheduler.jitter.percentile(50) < 0.05
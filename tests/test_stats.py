@@ -0,0 +1,41 @@
+from midiparser.stats import *
+from midiparser.parser import *
+from . helpers import *
+
+class TestParseStats:
+    def test_fromFile(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        stats = ParseStats(traceMemory = True)
+
+        midiFile = MidiFile.fromFile(filePath, stats = stats)
+
+        assert midiFile == MidiFile.fromFile(filePath)
+        assert [track.events for track in stats.tracks] == [3, 7]
+        assert [track.bytes for track in stats.tracks] == [len(conductorTrack), len(pianoTrack)]
+        assert stats.eventTypes["NoteOnEvent"].count == 2
+        assert stats.eventTypes["SysExEvent"].bytes == 6
+        assert stats.runningStatusHitRate == 2 / 10
+        assert stats.peakMemory > 0 and stats.seconds > 0
+
+    def test_eventTypesAndWorkers(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        stats = ParseStats()
+
+        midiFile = MidiFile.fromFile(filePath, workers = 2, eventTypes = {NoteOnEvent}, stats = stats)
+
+        assert midiFile == MidiFile.fromFile(filePath, eventTypes = {NoteOnEvent})
+        assert stats.eventTypes["Skipped"].count == 5
+        assert stats.asDict()["events"] == 10
+
+    def test_lazy(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        stats = ParseStats(traceMemory = True)
+
+        with MidiFile.fromFile(filePath, lazy = True, stats = stats) as midiFile:
+            midiFile.tracks[-1]
+            seconds = stats.seconds
+            midiFile.tracks[0]
+
+        assert [track.events for track in stats.tracks] == [3, 7]
+        assert 0 < seconds < stats.seconds
+        assert stats.peakMemory > 0
@@ -0,0 +1,79 @@
+import pytest
+from io import BytesIO
+from midiparser.stream import *
+from . helpers import *
+
+class UnseekableStream:
+    def __init__(self, data):
+        self.data = BytesIO(data)
+
+    def read(self, size):
+        return self.data.read(size)
+
+class TrickleStream:
+    # Returns at most a few bytes per read, like a pipe or a socket.
+    def __init__(self, data, chunkSize = 3):
+        self.data = BytesIO(data)
+        self.chunkSize = chunkSize
+
+    def read(self, size):
+        return self.data.read(min(size, self.chunkSize))
+
+class TestIterEvents:
+    def test_iterEvents(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        midiFile = MidiFile.fromFile(filePath)
+
+        events = list(iterEvents(filePath))
+
+        assert events == [(trackIndex, event)
+            for trackIndex, track in enumerate(midiFile.tracks) for event in track.events]
+
+    def test_iterEventsUnseekable(self):
+        data = packFile([pianoTrack, pianoTrack])
+
+        events = list(iterEvents(UnseekableStream(data)))
+
+        assert events == [(0, event) for event in pianoEvents] + [(1, event) for event in pianoEvents]
+
+    def test_iterEventsShortReads(self):
+        data = packFile([conductorTrack, pianoTrack + b"\x00\x00", pianoTrack])
+
+        events = list(iterEvents(TrickleStream(data)))
+
+        assert events == list(iterEvents(data))
+        with pytest.raises(EOFError):
+            list(iterEvents(TrickleStream(data[:-5])))
+
+    def test_iterEventsSkipsChunkPadding(self):
+        data = packFile([pianoTrack + b"\x00\x00", pianoTrack])
+
+        events = list(iterEvents(data))
+
+        assert [event for trackIndex, event in events if trackIndex == 1] == pianoEvents
+
+    def test_iterEventsLongHeader(self):
+        data = packFile([conductorTrack, pianoTrack])
+        # An eight byte header chunk, with two bytes a future version might define.
+        data = data[:4] + b"\x00\x00\x00\x08" + data[8:14] + b"\x00\x00" + data[14:]
+
+        events = list(iterEvents(TrickleStream(data)))
+
+        assert events == [(trackIndex, event)
+            for trackIndex, track in enumerate(MidiFile.fromBuffer(data).tracks) for event in track.events]
+        assert [event for trackIndex, event in events if trackIndex == 1] == pianoEvents
+
+    def test_iterEventsEventTypes(self):
+        data = packFile([conductorTrack, pianoTrack])
+        eventTypes = {NoteOnEvent, SysExEvent, TrackNameEvent}
+
+        events = list(iterEvents(UnseekableStream(data), eventTypes = eventTypes))
+
+        assert events == [
+            (0, TrackNameEvent(0, "Conductor")),
+            (1, NoteOnEvent(0, 1, 60, 64)),
+            (1, NoteOnEvent(240, 1, 62, 80)),
+            (1, SysExEvent(480, b"\x7E\x09\xF7")),
+        ]
+        assert events == [(trackIndex, event) for trackIndex, track in
+            enumerate(MidiFile.fromBuffer(data, eventTypes = eventTypes).tracks) for event in track.events]
@@ -0,0 +1,54 @@
+import pytest
+from midiparser.tempo import *
+from midiparser.parser import *
+from . helpers import *
+
+# Two beats at 120 BPM, then a change to 60 BPM at tick 960.
+tempoTrack = (
+    packVLQ(0) + b"\xFF\x51\x03\x07\xA1\x20" +
+    packVLQ(960) + b"\xFF\x51\x03\x0F\x42\x40" +
+    packVLQ(0) + b"\xFF\x2F\x00"
+)
+
+def makeMidiFile():
+    return MidiFile.fromBuffer(packFile([tempoTrack, pianoTrack]))
+
+class TestTempoMap:
+    def test_tickToSeconds(self):
+        tempoMap = makeMidiFile().tempoMap()
+
+        assert tempoMap.tickToSeconds(0) == 0.0
+        assert tempoMap.tickToSeconds(480) == pytest.approx(0.5)
+        assert tempoMap.tickToSeconds(960) == pytest.approx(1.0)
+        assert tempoMap.tickToSeconds(1440) == pytest.approx(2.0)
+        assert tempoMap.tempoAt(1000) == 1000000
+
+    def test_secondsToTick(self):
+        tempoMap = makeMidiFile().tempoMap()
+
+        for tick in (0, 100, 960, 1500):
+            assert tempoMap.secondsToTick(tempoMap.tickToSeconds(tick)) == pytest.approx(tick)
+
+    def test_ticksToSeconds(self):
+        numpy = pytest.importorskip("numpy")
+        tempoMap = makeMidiFile().tempoMap()
+        ticks = numpy.array([0, 480, 960, 1440])
+
+        assert tempoMap.ticksToSeconds(ticks) == pytest.approx([0.0, 0.5, 1.0, 2.0])
+        assert tempoMap.secondsToTicks([0.0, 0.5, 1.0, 2.0]) == pytest.approx(ticks)
+
+    def test_smpteDivision(self):
+        tempoMap = TempoMap(0xE728, [(0, 1000000)])
+
+        assert tempoMap.tickToSeconds(1000) == pytest.approx(1.0)
+
+    def test_eventsBetween(self):
+        tempoMap = makeMidiFile().tempoMap()
+
+        events = tempoMap.eventsBetween(0.25, 1.0)
+
+        assert [(trackIndex, event) for seconds, trackIndex, event in events] == [
+            (1, pianoEvents[2]), (1, pianoEvents[3]), (1, pianoEvents[4]),
+            (1, pianoEvents[5]), (1, pianoEvents[6]),
+        ]
+        assert events[0][0] == pytest.approx(0.25)
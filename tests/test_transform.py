@@ -0,0 +1,48 @@
+import pytest
+from midiparser.transform import *
+from . helpers import *
+
+def makeMidiFile():
+    return MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack]))
+
+pipeline = (Pipeline()
+    .transpose(3)
+    .quantize(100)
+    .remapChannels({1 : 9})
+    .scaleVelocity(1.5)
+    .scaleTempo(2)
+    .filter({NoteOnEvent, NoteOffEvent, TempoEvent, ProgramEvent}))
+
+class TestPipeline:
+    def test_apply(self):
+        midiFile = makeMidiFile()
+
+        transformed = pipeline.apply(midiFile)
+
+        assert midiFile == makeMidiFile()
+        assert transformed.tracks[0].events == [TempoEvent(0, 250000), EndOfTrackEvent(0)]
+        assert transformed.tracks[1].events == [
+            ProgramEvent(0, 9, 5),
+            NoteOnEvent(0, 9, 63, 96),
+            NoteOffEvent(200, 9, 63, 0),
+            NoteOnEvent(0, 9, 65, 120),
+            NoteOffEvent(500, 9, 65, 32),
+            EndOfTrackEvent(0),
+        ]
+
+    def test_streamAndArrays(self, tmp_path):
+        filePath = writeFile(tmp_path, [conductorTrack, pianoTrack])
+        expected = pipeline.apply(makeMidiFile())
+
+        assert pipeline.applyFile(filePath) == expected
+        assert pipeline.applyFile(packFile([conductorTrack, pianoTrack])) == expected
+        pytest.importorskip("numpy")
+        assert pipeline.applyArrays(makeMidiFile().toArrays()).toMidiFile() == expected
+
+    def test_dropsNotesOutOfRange(self):
+        transformed = Pipeline().transpose(-61).apply(makeMidiFile())
+
+        assert transformed.tracks[1].events[1:4] == [
+            NoteOnEvent(240, 1, 1, 80), NoteOffEvent(480, 1, 1, 32), SysExEvent(0, b"\x7E\x09\xF7")]
+        with pytest.raises(ValueError):
+            Pipeline().quantize(0)
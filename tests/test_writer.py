@@ -0,0 +1,43 @@
+import random
+from midiparser.parser import *
+from midiparser.writer import *
+from . helpers import *
+
+def randomEvents(generator, count):
+    events = [TrackNameEvent(0, "Random"), TempoEvent(0, 400000), SmpteOffsetEvent(0, 1, 2, 3, 24, 0)]
+    for i in range(count):
+        deltaTime = generator.choice((0, 1, 127, 128, 16383, 16384, 0x0FFFFFFF))
+        channel = generator.randrange(16)
+        kind = generator.randrange(10)
+        if kind == 0: events.append(ProgramEvent(deltaTime, channel, generator.randrange(128)))
+        elif kind == 1: events.append(ChannelPressureEvent(deltaTime, channel, generator.randrange(128)))
+        elif kind == 2: events.append(PitchBendEvent(deltaTime, channel, 0, 64))
+        elif kind == 3: events.append(SysExEvent(deltaTime, bytes(range(generator.randrange(200)))))
+        elif kind == 4: events.append(MarkerEvent(deltaTime, "M\xE9" * generator.randrange(100)))
+        elif kind == 5: events.append(NoteOffEvent(deltaTime, channel, 60, generator.choice((0, 64))))
+        else: events.append(NoteOnEvent(deltaTime, channel, generator.randrange(128), generator.randrange(1, 128)))
+    events.append(EndOfTrackEvent(0))
+    return events
+
+class TestWriter:
+    def test_toBytes(self):
+        midiFile = MidiFile.fromBuffer(packFile([conductorTrack, pianoTrack]))
+
+        assert midiFile.toBytes() == packFile([conductorTrack, pianoTrack])
+
+    def test_roundTrip(self, tmp_path):
+        generator = random.Random(0)
+        midiFile = MidiFile(1, 960, [MidiTrack(randomEvents(generator, 2000)) for i in range(3)])
+
+        midiFile.toFile(tmp_path / "random.mid")
+
+        assert MidiFile.fromFile(tmp_path / "random.mid") == midiFile
+        assert MidiFile.fromBuffer(midiFile.toBytes(compressNoteOffs = False)) == midiFile
+
+    def test_runningStatus(self):
+        events = [NoteOnEvent(0, 0, 60, 100), NoteOffEvent(10, 0, 60, 0), NoteOnEvent(0, 0, 62, 100)]
+        buffer = bytearray(1)
+
+        offset = encodeEvents(events, buffer, 0)
+
+        assert buffer[:offset] == b"\x00\x90\x3C\x64\x0A\x3C\x00\x00\x3E\x64\x00\xFF\x2F\x00"